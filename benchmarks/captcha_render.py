@@ -0,0 +1,49 @@
+"""Measures captcha images rendered per second.
+
+Compares rendering with cold font and glyph caches, as every captcha used
+to reload its fonts and rasterise its text, with the process-wide caches.
+
+Run from the repository root::
+
+    python -m benchmarks.captcha_render [images]
+"""
+
+import os
+import sys
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.testproject.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from gqlauth.captcha.captcha_factorty import generate_captcha_text  # noqa: E402
+from gqlauth.captcha.create import glyph_atlas, load_font  # noqa: E402
+
+
+def cold():
+    load_font.cache_clear()
+    glyph_atlas.clear()
+    generate_captcha_text()
+
+
+def render(generate, images: int) -> float:
+    start = time.perf_counter()
+    for _ in range(images):
+        generate()
+    return images / (time.perf_counter() - start)
+
+
+def main(images: int = 200):
+    scenarios = [
+        ("cold font and glyph caches", cold),
+        ("font cache + glyph atlas", generate_captcha_text),
+    ]
+    generate_captcha_text()  # warm up
+    for name, generate in scenarios:
+        print(f"{name:<40} {render(generate, images):>10.1f} images/s")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
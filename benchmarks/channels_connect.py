@@ -0,0 +1,107 @@
+"""Measures connects per second through `channels_jwt_middleware`.
+
+Compares the previous `database_sync_to_async` based authentication with
+the async-native one, alone, with a user cache, and in stateless mode.
+
+Run from the repository root::
+
+    python -m benchmarks.channels_connect [connects] [concurrency]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.testproject.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from channels.db import database_sync_to_async  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from gqlauth.core.constants import JWT_PREFIX  # noqa: E402
+from gqlauth.core.middlewares import (  # noqa: E402
+    USER_OR_ERROR_KEY,
+    channels_jwt_middleware,
+    get_user_or_error,
+)
+from gqlauth.core.utils import app_settings  # noqa: E402
+from gqlauth.jwt.cache import LocMemUserCache  # noqa: E402
+from gqlauth.jwt.types_ import TokenType  # noqa: E402
+
+
+async def inner(scope, receive, send):
+    assert scope[USER_OR_ERROR_KEY].user.is_authenticated
+
+
+def previous_channels_jwt_middleware(app):
+    get_user_or_error_async = database_sync_to_async(get_user_or_error)
+
+    async def middleware(scope, receive, send):
+        scope[USER_OR_ERROR_KEY] = await get_user_or_error_async(scope)
+        return await app(scope, receive, send)
+
+    return middleware
+
+
+async def connect_storm(middleware, token: str, connects: int, concurrency: int):
+    async def connect():
+        scope = {"headers": [(b"authorization", token.encode())]}
+        await middleware(scope, None, None)
+
+    start = time.perf_counter()
+    for _ in range(connects // concurrency):
+        await asyncio.gather(*(connect() for _ in range(concurrency)))
+    return connects / (time.perf_counter() - start)
+
+
+def token_for(user) -> str:
+    return f"{JWT_PREFIX} {TokenType.from_user(user).token}"
+
+
+def main(connects: int = 2000, concurrency: int = 100):
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        user_model = get_user_model()
+        user = user_model.objects.create_user(
+            **{user_model.USERNAME_FIELD: "bench", "password": "bench-password"}
+        )
+        scenarios = [
+            ("database_sync_to_async (previous)", previous_channels_jwt_middleware, {}),
+            ("async ORM", channels_jwt_middleware, {}),
+            (
+                "async ORM + LocMemUserCache",
+                channels_jwt_middleware,
+                {"JWT_USER_CACHE": LocMemUserCache()},
+            ),
+            (
+                "stateless claims",
+                channels_jwt_middleware,
+                {"JWT_STATELESS_AUTHENTICATION": True},
+            ),
+        ]
+        for name, factory, overrides in scenarios:
+            defaults = {key: getattr(app_settings, key) for key in overrides}
+            for key, value in overrides.items():
+                setattr(app_settings, key, value)
+            try:
+                # tokens are minted after the overrides so claims are included.
+                rate = asyncio.run(
+                    connect_storm(
+                        factory(inner), token_for(user), connects, concurrency
+                    )
+                )
+            finally:
+                for key, value in defaults.items():
+                    setattr(app_settings, key, value)
+            print(f"{name:<40} {rate:>10.0f} connects/s")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
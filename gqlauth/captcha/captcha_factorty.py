@@ -4,6 +4,7 @@ from dataclasses import dataclass
 from pathlib import Path
 
 from django.core.files.base import ContentFile
+from PIL import Image as PilImage
 from PIL.Image import Image
 
 from gqlauth.settings import gqlauth_settings as app_settings
@@ -16,28 +17,40 @@ FONTS_PATH = str(Path(__file__).parent.joinpath("fonts"))
 
 @dataclass
 class CaptchaInstanceType:
-    pil_image: Image
+    """A rendered captcha, kept as PNG bytes so that it is encoded only
+    once."""
+
+    png: bytes
     text: str
 
+    @classmethod
+    def from_image(cls, pil_image: Image, text: str) -> "CaptchaInstanceType":
+        bytes_array = io.BytesIO()
+        pil_image.save(bytes_array, format="PNG")
+        return cls(png=bytes_array.getvalue(), text=text)
+
+    @property
+    def pil_image(self) -> Image:
+        return PilImage.open(io.BytesIO(self.png))
+
     def to_django(self, name: str) -> ContentFile:
         # inspired by https://stackoverflow.com/questions/34140900
-        bytes_array = io.BytesIO()
-        self.pil_image.save(bytes_array, format="PNG")
-        return ContentFile(bytes_array.getvalue(), name + ".png")
+        return ContentFile(self.png, name + ".png")
 
     def show(self):
         self.pil_image.show()
 
 
+image_captcha = ImageCaptcha(
+    width=300,
+    height=150,
+    heb_fonts=[FONTS_PATH + "/stam.ttf"],
+    fonts=[FONTS_PATH + "/OpenSans-Semibold.ttf"],
+)
+
+
 def get_image(text):
-    image = ImageCaptcha(
-        width=300,
-        height=150,
-        heb_fonts=[FONTS_PATH + "/stam.ttf"],
-        fonts=[FONTS_PATH + "/OpenSans-Semibold.ttf"],
-    )
-    image = image.generate_image(text)
-    return image
+    return image_captcha.generate_image(text)
 
 
 def generate_text() -> str:
@@ -47,4 +60,4 @@ def generate_text() -> str:
 def generate_captcha_text() -> CaptchaInstanceType:
     text = generate_text()
     image = get_image(text)
-    return CaptchaInstanceType(pil_image=image, text=text)
+    return CaptchaInstanceType.from_image(image, text)
@@ -1,13 +1,67 @@
+import functools
 import random
+import threading
 from io import BytesIO
+from typing import NamedTuple
 
 from PIL import Image, ImageFilter
 from PIL.ImageDraw import Draw
-from PIL.ImageFont import truetype
+from PIL.ImageFont import FreeTypeFont, truetype
 
-table = []
-for i in range(256):
-    table.append(int(i * 1.97))
+
+@functools.lru_cache(maxsize=None)
+def load_font(path: str, size: int) -> FreeTypeFont:
+    """Loads a font once per process."""
+    return truetype(path, size)
+
+
+class Glyph(NamedTuple):
+    #: coverage of the glyph, cropped to its ink.
+    mask: Image.Image
+    #: size of the glyph's bounding box when drawn at the origin.
+    width: int
+    height: int
+
+
+class GlyphAtlas:
+    """Process-wide cache of rasterised glyphs per font, size and
+    character.
+
+    Captchas only distort and composite these masks, text is rasterised once
+    per glyph. The atlas is bounded by the fonts, sizes and characters the
+    captcha text factory uses.
+    """
+
+    def __init__(self):
+        self._glyphs: dict[tuple[str, int, str], Glyph] = {}
+        # FreeType faces are not thread safe, rasterise one glyph at a time.
+        self._lock = threading.Lock()
+
+    def get(self, path: str, size: int, char: str) -> Glyph:
+        key = (path, size, char)
+        if (glyph := self._glyphs.get(key)) is None:
+            with self._lock:
+                if (glyph := self._glyphs.get(key)) is None:
+                    glyph = self._glyphs[key] = self._render(
+                        load_font(path, size), char
+                    )
+        return glyph
+
+    @staticmethod
+    def _render(font: FreeTypeFont, char: str) -> Glyph:
+        _, _, w, h = font.getbbox(char)
+        w, h = max(w, 1), max(h, 1)
+        im = Image.new("L", (w, h))
+        Draw(im).text((0, 0), char, font=font, fill=255)
+        bbox = im.getbbox()
+        return Glyph(im.crop(bbox) if bbox else im, w, h)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._glyphs.clear()
+
+
+glyph_atlas = GlyphAtlas()
 
 
 class _Captcha:
@@ -63,16 +117,15 @@ class ImageCaptcha(_Captcha):
         self._fonts = fonts
         self.heb_fonts = heb_fonts
         self._font_sizes = font_sizes or (42, 50, 56)
-        self._truefonts = []
 
-    @property
-    def truefonts(self):
-        if self._truefonts:
-            return self._truefonts
-        self._truefonts = tuple(
-            truetype(n, s) for n in self._fonts for s in self._font_sizes
-        )
-        return self._truefonts
+    @functools.cached_property
+    def truefonts(self) -> tuple[tuple[str, int], ...]:
+        """(path, size) pairs to draw characters with."""
+        return tuple((n, s) for n in self._fonts for s in self._font_sizes)
+
+    @functools.cached_property
+    def heb_truefonts(self) -> tuple[tuple[str, int], ...]:
+        return tuple((n, s) for n in self.heb_fonts or () for s in self._font_sizes)
 
     @staticmethod
     def create_noise_curve(image, color):
@@ -107,30 +160,19 @@ class ImageCaptcha(_Captcha):
             a tuple of 3 numbers, such as (0, 255, 255).
         """
         image = Image.new("RGB", (self._width, self._height), background)
-        draw = Draw(image)
 
         def _draw_character(c):
             # if hebrew
-            direction = "ltr"
-            if "\u0590" <= c <= "\u05ea" and self.heb_fonts:
-                direction = "rtl"
-                font = random.choice(
-                    tuple(
-                        truetype(n, s) for n in self.heb_fonts for s in self._font_sizes
-                    )
-                )
+            if "\u0590" <= c <= "\u05ea" and self.heb_truefonts:
+                glyph = glyph_atlas.get(*random.choice(self.heb_truefonts), c)
             else:
-                font = random.choice(self.truefonts)
-            _, _, w, h = draw.textbbox((0, 0), text=c, font=font, direction=direction)
-
-            dx = random.randint(0, 4)
-            dy = random.randint(0, 6)
-            im = Image.new("RGBA", (w + dx, h + dy))
-            Draw(im).text((dx, dy), c, font=font, fill=color)
+                glyph = glyph_atlas.get(*random.choice(self.truefonts), c)
+            w, h = glyph.width, glyph.height
 
             # rotate
-            im = im.crop(im.getbbox())
-            im = im.rotate(random.uniform(-30, 30), Image.Resampling.BILINEAR, expand=1)
+            im = glyph.mask.rotate(
+                random.uniform(-30, 30), Image.Resampling.BILINEAR, expand=1
+            )
 
             # warp
             dx = w * random.uniform(0.1, 0.3)
@@ -170,10 +212,15 @@ class ImageCaptcha(_Captcha):
         rand = int(0.25 * average)
         offset = int(average * 0.1)
 
+        # darker colors are pasted more transparently.
+        red, green, blue = color[:3]
+        strength = min((red * 299 + green * 587 + blue * 114) / 1000 * 1.97, 255)
+        table = [int(i * strength / 255) for i in range(256)]
         for im in images:
             w, h = im.size
-            mask = im.convert("L").point(table)
-            image.paste(im, (offset, int((self._height - h) / 2)), mask)
+            image.paste(
+                color[:3], (offset, int((self._height - h) / 2)), im.point(table)
+            )
             offset = offset + w + random.randint(-rand, 0)
 
         if width > self._width:
@@ -1,14 +1,13 @@
 from __future__ import annotations
 
 import importlib.util
-import io
 import uuid
 
 from django.db import models
 from django.utils import timezone
 
 from gqlauth.captcha.captcha_factorty import CaptchaInstanceType, generate_captcha_text
-from gqlauth.core.constants import Messages
+from gqlauth.captcha.pool import get_captcha_pool
 from gqlauth.settings import gqlauth_settings as app_settings
 
 PILLOW_INSTALLED = False
@@ -18,6 +17,9 @@ if importlib.util.find_spec("PIL"):
 
 class Captcha(models.Model):
     instance: CaptchaInstanceType
+    # set by storages that hand the captcha back to the client, see
+    # `gqlauth.captcha.storage.SignedCaptchaStorage`.
+    challenge: str | None = None
     uuid = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     text = models.CharField(max_length=50, editable=False)
     insert_time = models.DateTimeField(auto_now_add=True, editable=False)
@@ -40,16 +42,17 @@ class Captcha(models.Model):
 
     @classmethod
     def create_captcha(cls):
-        cap = generate_captcha_text()
+        pool = get_captcha_pool()
+        cap = pool.get() if pool is not None else generate_captcha_text()
         obj = cls(text=cap.text)
         # saving the image for future use when resolving to base64 or saving to .png
         obj.instance = cap
-        obj.save()
-        if app_settings.FORCE_SHOW_CAPTCHA:
-            cap.pil_image.show()
         if app_settings.CAPTCHA_SAVE_IMAGE:
             django_content_file = obj.instance.to_django(name=str(obj.uuid))
-            obj.image.save(django_content_file.name, django_content_file)
+            obj.image.save(django_content_file.name, django_content_file, save=False)
+        app_settings.CAPTCHA_STORAGE.save(obj)
+        if app_settings.FORCE_SHOW_CAPTCHA:
+            cap.show()
 
         return obj
 
@@ -58,48 +61,19 @@ class Captcha(models.Model):
         super().save(*args, **kwargs)
 
     def validate(self, user_entry: str):
-        """Validates input_.
-
-        - if tried to validate more than 3 times obj will be deleted in the database
-        - else increments by one
-        - if reaches expiery date deletes the obj
-        - returns bool for success state
-        """
-        if self.tries > app_settings.CAPTCHA_MAX_RETRIES:
-            try:
-                self.delete()
-            except ValueError:
-                ...  # object is deleted
-            return Messages.CAPTCHA_MAX_RETRIES
-
-        self.tries += 1
-
-        # check expiery
-        if timezone.now() > self.insert_time + app_settings.CAPTCHA_EXPIRATION_DELTA:
-            try:
-                self.delete()
-            except ValueError:
-                ...  # object is deleted
-            return Messages.CAPTCHA_EXPIRED
-
-        # validate
-        if app_settings.CAPTCHA_TEXT_VALIDATOR(
-            self.text.replace(" ", ""), user_entry.replace(" ", "")
-        ):
-            # delete captcha if valid
-            self.delete()
-            return Messages.CAPTCHA_VALID
-
-        return Messages.CAPTCHA_INVALID
+        """Checks `user_entry` against this captcha with `CAPTCHA_STORAGE`,
+        see `CaptchaStorage.validate`, and returns the captcha message for
+        the result."""
+        return app_settings.CAPTCHA_STORAGE.validate(
+            self.uuid, user_entry, challenge=self.challenge
+        )
 
     def as_bytes(self):
         """Stores the image on a bytes_array.
 
         The scalar will further convert it to b64 string representation.
         """
-        bytes_array = io.BytesIO()
-        self.instance.pil_image.save(bytes_array, format="PNG")
-        return bytes_array.getvalue()
+        return self.instance.png
 
     def __str__(self):
         interval = (
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+from typing import Callable
+
+from gqlauth.captcha.captcha_factorty import CaptchaInstanceType, generate_captcha_text
+from gqlauth.settings import gqlauth_settings as app_settings
+
+logger = logging.getLogger(__name__)
+
+# how long a full pool's worker waits before checking whether it was stopped.
+STOP_POLL_INTERVAL = 0.5
+
+
+class CaptchaPool:
+    """Keeps up to `size` rendered captchas ready.
+
+    A daemon thread, started on first use, renders captchas ahead of time
+    and blocks while the pool is full, so that `get` is just a pop. Pillow
+    releases the GIL while drawing and encoding, so rendering mostly runs on
+    another core. When the pool runs dry the captcha is rendered inline.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        factory: Callable[[], CaptchaInstanceType] = generate_captcha_text,
+    ):
+        self.size = size
+        self.factory = factory
+        self._lock = threading.Lock()
+        self._pid: int | None = None
+        self._queue: queue.Queue[CaptchaInstanceType] = queue.Queue(maxsize=size)
+        self._stop = threading.Event()
+        self._worker: threading.Thread | None = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._pid != os.getpid():
+                # threads don't survive a fork, neither should their leftovers.
+                self._pid = os.getpid()
+                self._queue = queue.Queue(maxsize=self.size)
+                self._worker = None
+            if self._stop.is_set():
+                return
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._fill, args=(self._queue,), daemon=True
+                )
+                self._worker.name = "gqlauth-captcha-pool"
+                self._worker.start()
+
+    def _fill(self, pool: queue.Queue[CaptchaInstanceType]) -> None:
+        while not self._stop.is_set():
+            try:
+                captcha = self.factory()
+            except Exception:
+                logger.exception("Failed to render a captcha for the pool.")
+                self._stop.wait(1)
+                continue
+            # wakes up now and then to notice `stop`.
+            while not self._stop.is_set():
+                try:
+                    pool.put(captcha, timeout=STOP_POLL_INTERVAL)
+                    break
+                except queue.Full:
+                    continue
+
+    def stop(self) -> None:
+        """Stops the worker, `get` renders captchas inline from now on."""
+        self._stop.set()
+        with self._lock:
+            worker = self._worker
+        if worker is not None and worker is not threading.current_thread():
+            worker.join(timeout=STOP_POLL_INTERVAL * 2)
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def get(self) -> CaptchaInstanceType:
+        self.start()
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            return self.factory()
+
+
+_pool: CaptchaPool | None = None
+
+
+def get_captcha_pool() -> CaptchaPool | None:
+    """Returns the process-wide pool, or `None` if `CAPTCHA_POOL_SIZE` is
+    0."""
+    global _pool
+    size = app_settings.CAPTCHA_POOL_SIZE
+    if not size:
+        return None
+    if _pool is None or _pool.size != size:
+        if _pool is not None:
+            _pool.stop()
+        _pool = CaptchaPool(size)
+    return _pool
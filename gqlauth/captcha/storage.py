@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import base64
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+from uuid import UUID
+
+from django.core import signing
+from django.core.cache import BaseCache, caches
+from django.db.models import F
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+if TYPE_CHECKING:  # pragma: no cover
+    from gqlauth.captcha.models import Captcha
+
+
+def text_matches(text: str, user_entry: str) -> bool:
+    from gqlauth.settings import gqlauth_settings as app_settings
+
+    return app_settings.CAPTCHA_TEXT_VALIDATOR(
+        text.replace(" ", ""), user_entry.replace(" ", "")
+    )
+
+
+class CaptchaStorage(ABC):
+    """Where `CAPTCHA_STORAGE` keeps captchas until they are answered.
+
+    Captchas are handed around as unsaved `gqlauth.captcha.models.Captcha`
+    instances. An implementation has to count tries and consume the
+    captcha atomically, so that concurrent attempts can't exceed
+    `CAPTCHA_MAX_RETRIES` or answer the same captcha twice, and should
+    compare answers with `text_matches`.
+    """
+
+    @abstractmethod
+    def save(self, captcha: Captcha) -> None:
+        """Keeps the captcha for `CAPTCHA_EXPIRATION_DELTA`, it may set
+        `captcha.challenge` for the client to send back."""
+
+    @abstractmethod
+    def validate(
+        self, uuid: UUID, user_entry: str, challenge: str | None = None
+    ) -> list:
+        """Checks an answer, returns one of the captcha `Messages`.
+
+        `challenge` is what the storage set on the captcha, if anything. A
+        captcha can be answered correctly only once.
+        """
+
+
+class DatabaseCaptchaStorage(CaptchaStorage):
+    """Keeps captchas in the `Captcha` table.
+
+    An attempt consumes the captcha or counts the try with conditional
+    statements that only match while it is neither expired nor out of
+    tries, so concurrent attempts can't exceed `CAPTCHA_MAX_RETRIES` or use
+    a captcha twice. With the default `CAPTCHA_TEXT_VALIDATOR` the answer is
+    compared by the `DELETE` itself, a custom one needs the text read first.
+    """
+
+    def save(self, captcha: Captcha) -> None:
+        captcha.save()
+
+    @staticmethod
+    def _reject(uuid: UUID) -> list | None:
+        """Deletes the captcha if it can't be answered anymore, and returns
+        why."""
+        from gqlauth.captcha.models import Captcha
+        from gqlauth.core.constants import Messages
+        from gqlauth.settings import gqlauth_settings as app_settings
+
+        row = Captcha.objects.filter(uuid=uuid).values_list("tries", "insert_time")
+        if (found := row.first()) is None:
+            return Messages.CAPTCHA_EXPIRED
+        tries, insert_time = found
+        if timezone.now() > insert_time + app_settings.CAPTCHA_EXPIRATION_DELTA:
+            Captcha.objects.filter(uuid=uuid).delete()
+            return Messages.CAPTCHA_EXPIRED
+        if tries > app_settings.CAPTCHA_MAX_RETRIES:
+            Captcha.objects.filter(uuid=uuid).delete()
+            return Messages.CAPTCHA_MAX_RETRIES
+        return None
+
+    def validate(
+        self, uuid: UUID, user_entry: str, challenge: str | None = None
+    ) -> list:
+        from gqlauth.captcha.models import Captcha
+        from gqlauth.core.constants import Messages
+        from gqlauth.settings import gqlauth_settings as app_settings
+        from gqlauth.settings_type import default_captcha_text_validator
+
+        answerable = Captcha.objects.filter(
+            uuid=uuid,
+            tries__lte=app_settings.CAPTCHA_MAX_RETRIES,
+            insert_time__gte=timezone.now() - app_settings.CAPTCHA_EXPIRATION_DELTA,
+        )
+        if app_settings.CAPTCHA_TEXT_VALIDATOR is default_captcha_text_validator:
+            # stored texts are formatted, the default validator ignores spaces.
+            correct = answerable.filter(text=user_entry.replace(" ", ""))
+            # captchas have no relations or signals, a plain DELETE without
+            # the collector's transaction around it is enough.
+            if correct._raw_delete(correct.db):
+                return Messages.CAPTCHA_VALID
+            if answerable.update(tries=F("tries") + 1):
+                return Messages.CAPTCHA_INVALID
+        else:
+            text = (
+                Captcha.objects.filter(uuid=uuid).values_list("text", flat=True).first()
+            )
+            if text is None:
+                return Messages.CAPTCHA_EXPIRED
+            if text_matches(text, user_entry):
+                if answerable.delete()[0]:
+                    return Messages.CAPTCHA_VALID
+            elif answerable.update(tries=F("tries") + 1):
+                return Messages.CAPTCHA_INVALID
+        # expired, out of tries or answered by a concurrent attempt.
+        return self._reject(uuid) or Messages.CAPTCHA_EXPIRED
+
+
+class DjangoCacheCaptchaStorage(CaptchaStorage):
+    """Keeps captchas in one of the `CACHES` configured in django, expiring
+    after `CAPTCHA_EXPIRATION_DELTA`.
+
+    Tries are counted with the cache's atomic `incr`, and a correct answer
+    deletes the captcha so only one request can use it.
+    """
+
+    def __init__(self, alias: str | None = None):
+        self.alias = alias
+
+    @property
+    def cache(self) -> BaseCache:
+        from gqlauth.settings import gqlauth_settings as app_settings
+
+        return caches[self.alias or app_settings.CACHE_ALIAS]
+
+    @staticmethod
+    def _text_key(uuid: UUID) -> str:
+        return f"gqlauth:captcha:{uuid}"
+
+    @staticmethod
+    def _tries_key(uuid: UUID) -> str:
+        return f"gqlauth:captcha:tries:{uuid}"
+
+    def save(self, captcha: Captcha) -> None:
+        from gqlauth.settings import gqlauth_settings as app_settings
+
+        self.cache.set_many(
+            {
+                self._text_key(captcha.uuid): captcha._format(captcha.text),
+                self._tries_key(captcha.uuid): 0,
+            },
+            app_settings.CAPTCHA_EXPIRATION_DELTA.total_seconds(),
+        )
+
+    def validate(
+        self, uuid: UUID, user_entry: str, challenge: str | None = None
+    ) -> list:
+        from gqlauth.core.constants import Messages
+        from gqlauth.settings import gqlauth_settings as app_settings
+
+        cache = self.cache
+        text_key, tries_key = self._text_key(uuid), self._tries_key(uuid)
+        try:
+            tries = cache.incr(tries_key)
+        except ValueError:
+            return Messages.CAPTCHA_EXPIRED
+        # the first attempt is not a retry.
+        if tries > app_settings.CAPTCHA_MAX_RETRIES + 1:
+            cache.delete_many([text_key, tries_key])
+            return Messages.CAPTCHA_MAX_RETRIES
+        if (text := cache.get(text_key)) is None:
+            return Messages.CAPTCHA_EXPIRED
+        if not text_matches(text, user_entry):
+            return Messages.CAPTCHA_INVALID
+        # whoever deletes it first gets to use it.
+        if not cache.delete(text_key):
+            return Messages.CAPTCHA_EXPIRED
+        cache.delete(tries_key)
+        return Messages.CAPTCHA_VALID
+
+
+class SignedCaptchaStorage(DjangoCacheCaptchaStorage):
+    """Hands captchas back to the client as a signed, expiring challenge
+    instead of storing them, so issuing one costs no writes.
+
+    The challenge carries the answer encrypted with a key derived from
+    `SECRET_KEY` and the captcha's uuid, and answers are checked with
+    `CAPTCHA_TEXT_VALIDATOR` like every other storage. Checking one is not
+    stateless though: the tries and the consumed challenges are written to
+    the cache, which should be shared by all your processes, or challenges
+    could be replayed.
+    """
+
+    salt = "gqlauth.captcha.challenge"
+
+    @staticmethod
+    def _consumed_key(uuid: UUID) -> str:
+        return f"gqlauth:captcha:consumed:{uuid}"
+
+    @classmethod
+    def _keystream(cls, uuid: UUID, length: int) -> bytes:
+        # HMAC-SHA256 in counter mode, the uuid is never reused.
+        blocks = (
+            salted_hmac(cls.salt, f"{uuid}:{i}", algorithm="sha256").digest()
+            for i in range(-(-length // 32))
+        )
+        return b"".join(blocks)[:length]
+
+    @classmethod
+    def _seal(cls, uuid: UUID, text: str) -> str:
+        data = text.encode()
+        sealed = bytes(a ^ b for a, b in zip(data, cls._keystream(uuid, len(data))))
+        return base64.urlsafe_b64encode(sealed).decode()
+
+    @classmethod
+    def _unseal(cls, uuid: UUID, sealed: str) -> str:
+        data = base64.urlsafe_b64decode(sealed)
+        return bytes(
+            a ^ b for a, b in zip(data, cls._keystream(uuid, len(data)))
+        ).decode()
+
+    def save(self, captcha: Captcha) -> None:
+        captcha.challenge = signing.dumps(
+            {
+                "uuid": str(captcha.uuid),
+                "text": self._seal(captcha.uuid, captcha._format(captcha.text)),
+            },
+            salt=self.salt,
+        )
+
+    def validate(
+        self, uuid: UUID, user_entry: str, challenge: str | None = None
+    ) -> list:
+        from gqlauth.core.constants import Messages
+        from gqlauth.settings import gqlauth_settings as app_settings
+
+        delta = app_settings.CAPTCHA_EXPIRATION_DELTA
+        try:
+            payload = signing.loads(challenge or "", salt=self.salt, max_age=delta)
+        except signing.BadSignature:
+            return Messages.CAPTCHA_EXPIRED
+        if payload["uuid"] != str(uuid):
+            return Messages.CAPTCHA_EXPIRED
+        cache = self.cache
+        tries_key = self._tries_key(uuid)
+        cache.add(tries_key, 0, delta.total_seconds())
+        try:
+            tries = cache.incr(tries_key)
+        except ValueError:  # evicted in between
+            return Messages.CAPTCHA_EXPIRED
+        # the first attempt is not a retry.
+        if tries > app_settings.CAPTCHA_MAX_RETRIES + 1:
+            return Messages.CAPTCHA_MAX_RETRIES
+        if not text_matches(self._unseal(uuid, payload["text"]), user_entry):
+            return Messages.CAPTCHA_INVALID
+        # `add` is atomic, only the first correct answer consumes the challenge.
+        if not cache.add(self._consumed_key(uuid), True, delta.total_seconds()):
+            return Messages.CAPTCHA_EXPIRED
+        return Messages.CAPTCHA_VALID
@@ -17,3 +17,10 @@ if PILLOW_INSTALLED:
         @strawberry_django.field(description="returns the b64 encoded image.")
         def pil_image(self: models.Captcha) -> Image:  # type: ignore
             return self.as_bytes()  # type: ignore
+
+        @strawberry_django.field(
+            description="signed challenge to send back with the answer, "
+            "only set by stateless captcha storages."
+        )
+        def challenge(self: models.Captcha) -> str | None:  # type: ignore
+            return self.challenge  # type: ignore
@@ -7,6 +7,13 @@ class Messages:
     UNAUTHENTICATED = [{"message": _("Unauthenticated."), "code": "unauthenticated"}]
     INVALID_TOKEN = [{"message": _("Invalid token."), "code": "invalid_token"}]
     EXPIRED_TOKEN = [{"message": _("Expired token."), "code": "expired_token"}]
+    REVOKED_TOKEN = [{"message": _("Revoked token."), "code": "revoked_token"}]
+    TOO_MANY_TOKENS = [
+        {
+            "message": _("Too many tokens to verify at once."),
+            "code": "too_many_tokens",
+        }
+    ]
     NO_SUFFICIENT_PERMISSIONS = [
         {"message": _("Expired token."), "code": "expired_token"}
     ]
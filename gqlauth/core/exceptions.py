@@ -35,6 +35,16 @@ class TokenExpired(GraphQLAuthError):
     default_message = _("This token is expired")
 
 
+class TokenRevoked(TokenExpired):
+    """The token was created before the user's tokens were revoked."""
+
+    default_message = _("This token was revoked")
+
+
+class TokenDenylisted(TokenRevoked):
+    """The token itself was revoked, see `JWT_DENYLIST`."""
+
+
 class PasswordAlreadySetError(GraphQLAuthError):
     default_message = _("Password already set for account.")
 
@@ -2,18 +2,21 @@ from __future__ import annotations
 
 import asyncio
 from collections.abc import Callable
+from functools import partial
 from typing import TYPE_CHECKING
 
-from asgiref.sync import sync_to_async
 from django.contrib.auth.models import AnonymousUser
 from django.http import HttpRequest
 from django.utils.decorators import sync_and_async_middleware
+from django.utils.functional import SimpleLazyObject
 from jwt import PyJWTError
 from strawberry import Schema
 
-from gqlauth.core.exceptions import TokenExpired
+from gqlauth.core.exceptions import TokenDenylisted, TokenExpired
 from gqlauth.core.types_ import GQLAuthError, GQLAuthErrors
-from gqlauth.core.utils import USER_UNION, app_settings
+from gqlauth.core.utils import USER_MODEL, USER_UNION, app_settings
+from gqlauth.jwt.cache import aget_token_generation, get_token_generation
+from gqlauth.jwt.claims import ClaimsUser
 from gqlauth.jwt.types_ import TokenType
 
 anon_user = AnonymousUser()
@@ -22,23 +25,64 @@ if TYPE_CHECKING:
 
 
 class UserOrError:
-    __slots__ = ("user", "error")
+    __slots__ = ("_user", "_error", "_resolver")
 
     def __init__(self, user: USER_UNION = anon_user, error: Exception | None = None):
-        self.user = user
-        self.error = error
+        self._user = user
+        self._error = error
+        self._resolver: Callable[[], UserOrError] | None = None
+
+    @classmethod
+    def lazy(cls, resolver: Callable[[], UserOrError]) -> UserOrError:
+        """Creates a `UserOrError` that would call `resolver` (i.e decode the
+        token and fetch the user) only when `user` or `error` is first
+        accessed."""
+        ret = cls()
+        ret._resolver = resolver
+        return ret
+
+    @property
+    def is_resolved(self) -> bool:
+        return self._resolver is None
+
+    def _resolve(self) -> None:
+        if self._resolver is not None:
+            # cleared only once resolved, so that a failure is raised again
+            # rather than turning into an anonymous user.
+            resolved = self._resolver()
+            self._user, self._error = resolved.user, resolved.error
+            self._resolver = None
+
+    @property
+    def user(self) -> USER_UNION:
+        self._resolve()
+        return self._user
+
+    @user.setter
+    def user(self, value: USER_UNION) -> None:
+        self._resolver = None
+        self._user = value
+
+    @property
+    def error(self) -> Exception | None:
+        self._resolve()
+        return self._error
+
+    @error.setter
+    def error(self, value: Exception | None) -> None:
+        self._resolver = None
+        self._error = value
 
 
 USER_OR_ERROR_KEY = UserOrError.__name__
 
 
-def get_user_or_error(scope_or_request: dict | HttpRequest) -> UserOrError:
-    user_or_error = UserOrError()
+def _decode_token(
+    scope_or_request: dict | HttpRequest, user_or_error: UserOrError
+) -> TokenType | None:
     if token_str := app_settings.JWT_TOKEN_FINDER(scope_or_request):
         try:
-            token = TokenType.from_token(token=token_str)
-            user = token.get_user_instance()
-            user_or_error.user = user
+            return TokenType.from_token(token=token_str)
 
         except PyJWTError:  # raised by python-jwt
             user_or_error.error = GQLAuthError(code=GQLAuthErrors.INVALID_TOKEN)
@@ -48,19 +92,65 @@ def get_user_or_error(scope_or_request: dict | HttpRequest) -> UserOrError:
 
     else:
         user_or_error.error = GQLAuthError(code=GQLAuthErrors.MISSING_TOKEN)
+    return None
+
+
+def _get_claims_user(token: TokenType) -> ClaimsUser | None:
+    if app_settings.JWT_STATELESS_AUTHENTICATION and token.payload.claims is not None:
+        return ClaimsUser(token)
+    return None
+
+
+def _pk_value(token: TokenType):
+    return getattr(token.payload, app_settings.JWT_PAYLOAD_PK.python_name)
 
+
+def get_user_or_error(scope_or_request: dict | HttpRequest) -> UserOrError:
+    user_or_error = UserOrError()
+    if token := _decode_token(scope_or_request, user_or_error):
+        try:
+            token.check_revoked()
+            if (claims_user := _get_claims_user(token)) is not None:
+                token.check_generation(get_token_generation(_pk_value(token)))
+                user_or_error.user = claims_user  # type: ignore
+            else:
+                user_or_error.user = token.get_user_instance()
+        except TokenDenylisted:
+            user_or_error.error = GQLAuthError(code=GQLAuthErrors.REVOKED_TOKEN)
+        except TokenExpired:
+            user_or_error.error = GQLAuthError(code=GQLAuthErrors.EXPIRED_TOKEN)
+        except USER_MODEL.DoesNotExist:
+            user_or_error.error = GQLAuthError(code=GQLAuthErrors.INVALID_TOKEN)
     return user_or_error
 
 
-def channels_jwt_middleware(inner: Callable):
-    from channels.db import database_sync_to_async
+async def aget_user_or_error(scope_or_request: dict | HttpRequest) -> UserOrError:
+    """Async version of `get_user_or_error`, the user is fetched using the
+    async ORM API."""
+    user_or_error = UserOrError()
+    if token := _decode_token(scope_or_request, user_or_error):
+        try:
+            await token.acheck_revoked()
+            if (claims_user := _get_claims_user(token)) is not None:
+                token.check_generation(await aget_token_generation(_pk_value(token)))
+                user_or_error.user = claims_user  # type: ignore
+            else:
+                user_or_error.user = await token.aget_user_instance()
+        except TokenDenylisted:
+            user_or_error.error = GQLAuthError(code=GQLAuthErrors.REVOKED_TOKEN)
+        except TokenExpired:
+            user_or_error.error = GQLAuthError(code=GQLAuthErrors.EXPIRED_TOKEN)
+        except USER_MODEL.DoesNotExist:
+            user_or_error.error = GQLAuthError(code=GQLAuthErrors.INVALID_TOKEN)
+    return user_or_error
+
 
+def channels_jwt_middleware(inner: Callable):
     if asyncio.iscoroutinefunction(inner):
-        get_user_or_error_async = database_sync_to_async(get_user_or_error)
 
         async def middleware(scope, receive, send):
             if not scope.get(USER_OR_ERROR_KEY, None):
-                user_or_error: UserOrError = await get_user_or_error_async(scope)
+                user_or_error: UserOrError = await aget_user_or_error(scope)
                 scope[USER_OR_ERROR_KEY] = user_or_error
             return await inner(scope, receive, send)
 
@@ -71,22 +161,24 @@ def channels_jwt_middleware(inner: Callable):
 
 @sync_and_async_middleware
 def django_jwt_middleware(get_response):
-    def logic(request: HttpRequest) -> None:
-        if not hasattr(request, USER_OR_ERROR_KEY):
-            user_or_error: UserOrError = get_user_or_error(request)
-            setattr(request, USER_OR_ERROR_KEY, user_or_error)
-
     if asyncio.iscoroutinefunction(get_response):
-        async_logic = sync_to_async(logic)
 
         async def middleware(request: HttpRequest):
-            await async_logic(request)
+            if not hasattr(request, USER_OR_ERROR_KEY):
+                user_or_error: UserOrError = await aget_user_or_error(request)
+                setattr(request, USER_OR_ERROR_KEY, user_or_error)
             return await get_response(request)
 
     else:
 
         def middleware(request: HttpRequest):  # type: ignore
-            logic(request)
+            # the token is decoded and the user fetched only if someone asks for them.
+            if not hasattr(request, USER_OR_ERROR_KEY):
+                setattr(
+                    request,
+                    USER_OR_ERROR_KEY,
+                    UserOrError.lazy(partial(get_user_or_error, request)),
+                )
             return get_response(request)
 
     return middleware
@@ -121,5 +213,8 @@ class JwtSchema(Schema):
             request.user = user_or_error.user  # type: ignore
         else:
             user_or_error: UserOrError = getattr(context.request, USER_OR_ERROR_KEY)  # type: ignore
-            context.request.user = user_or_error.user  # type: ignore
+            if user_or_error.is_resolved:
+                context.request.user = user_or_error.user  # type: ignore
+            else:
+                context.request.user = SimpleLazyObject(lambda: user_or_error.user)  # type: ignore
         return user_or_error
@@ -27,6 +27,7 @@ class GQLAuthErrors(Enum):
     UNAUTHENTICATED = "Unauthenticated."
     INVALID_TOKEN = "Invalid token."
     EXPIRED_TOKEN = "Expired token."
+    REVOKED_TOKEN = "Revoked token."
     NO_SUFFICIENT_PERMISSIONS = (
         "Permissions found could not satisfy the required permissions."
     )
@@ -1,4 +1,3 @@
-import contextlib
 import datetime
 import inspect
 import typing
@@ -63,6 +62,17 @@ def get_user(info: Info) -> USER_UNION:
         return info.context["request"].user
 
 
+def get_db_user(info: Info) -> USER_UNION:
+    """Like `get_user` but returns the model instance for users authenticated
+    by token claims only (see `JWT_STATELESS_AUTHENTICATION`)."""
+    from gqlauth.jwt.claims import ClaimsUser
+
+    user = get_user(info)
+    if isinstance(user, ClaimsUser):
+        return user.get_user_instance()
+    return user
+
+
 def cast_to_status_user(user: USER_UNION) -> UserProto:
     user.status  # type: ignore  # raise attribute error
     return user  # type: ignore
@@ -93,11 +103,8 @@ def get_payload_from_token(token, action, exp=None):
     return payload
 
 
-def revoke_user_refresh_token(user):
-    refresh_tokens = user.refresh_tokens.all()
-    for refresh_token in refresh_tokens:
-        with contextlib.suppress(Exception):
-            refresh_token.revoke()
+def revoke_user_refresh_token(user) -> int | None:
+    return app_settings.JWT_REFRESH_TOKEN_STORAGE.revoke_user(user)
 
 
 def fields_names(strawberry_fields: Iterable[StrawberryField]):
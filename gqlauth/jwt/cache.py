@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import hashlib
+import pickle
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+
+from django.core.cache import BaseCache, caches
+
+from gqlauth.core.utils import app_settings, utc_now
+
+if TYPE_CHECKING:  # pragma: no cover
+    from gqlauth.core.utils import UserProto
+    from gqlauth.jwt.types_ import TokenType
+
+
+class TokenCache:
+    """A bounded, thread-safe LRU cache of decoded tokens keyed by the raw
+    token string.
+
+    Entries are dropped once the token's `exp` has passed, so a hit is
+    always a token that was verified and is still valid.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._data: OrderedDict[str, TokenType] = OrderedDict()
+
+    def get(self, token: str) -> TokenType | None:
+        with self._lock:
+            token_type = self._data.get(token)
+            if token_type is None:
+                self.misses += 1
+                return None
+            if token_type.is_expired():
+                del self._data[token]
+                self.misses += 1
+                return None
+            self._data.move_to_end(token)
+            self.hits += 1
+            return token_type
+
+    def set(self, token_type: TokenType) -> None:
+        if token_type.payload.exp <= utc_now():
+            return
+        with self._lock:
+            self._data[token_type.token] = token_type
+            self._data.move_to_end(token_type.token)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_token_cache: TokenCache | None = None
+
+
+def get_token_cache() -> TokenCache | None:
+    """Returns the process-wide token cache, or `None` if
+    `JWT_TOKEN_CACHE_SIZE` is not set."""
+    global _token_cache
+    size = app_settings.JWT_TOKEN_CACHE_SIZE
+    if not size:
+        return None
+    if _token_cache is None or _token_cache.max_size != size:
+        _token_cache = TokenCache(max_size=size)
+    return _token_cache
+
+
+class UserCache(ABC):
+    """Where `JWT_USER_CACHE` keeps the users that tokens resolve to, keyed
+    by the value of `JWT_PAYLOAD_PK`.
+
+    A cached user comes with its `status` loaded and may be stale by up to
+    the cache's own timeout, the token generation check on a hit catches
+    revocations made meanwhile. `delete` is called when a user or its status
+    is saved or deleted in this process.
+    """
+
+    @abstractmethod
+    def get(self, pk_value: Any) -> UserProto | None:
+        """Returns a copy of the cached user, one that the request can modify
+        freely, or `None` on a miss."""
+
+    @abstractmethod
+    def set(self, pk_value: Any, user: UserProto) -> None:
+        """Caches `user`, later changes to the instance must not leak into
+        the cache."""
+
+    @abstractmethod
+    def delete(self, pk_value: Any) -> None:
+        """Drops the user if it is cached, a miss is not an error."""
+
+    async def aget(self, pk_value: Any) -> UserProto | None:
+        return self.get(pk_value)
+
+    async def aset(self, pk_value: Any, user: UserProto) -> None:
+        self.set(pk_value, user)
+
+
+class LocMemUserCache(UserCache):
+    """Process-local user cache.
+
+    Users are stored pickled, so each request gets its own instance.
+    """
+
+    def __init__(self, timeout: timedelta = timedelta(minutes=5), max_size=1000):
+        self.timeout = timeout
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._data: OrderedDict[Any, tuple[float, bytes]] = OrderedDict()
+
+    def get(self, pk_value: Any) -> UserProto | None:
+        with self._lock:
+            entry = self._data.get(pk_value)
+            if entry is None:
+                return None
+            expires, pickled = entry
+            if expires < time.monotonic():
+                del self._data[pk_value]
+                return None
+            self._data.move_to_end(pk_value)
+        return pickle.loads(pickled)
+
+    def set(self, pk_value: Any, user: UserProto) -> None:
+        pickled = pickle.dumps(user, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data[pk_value] = (
+                time.monotonic() + self.timeout.total_seconds(),
+                pickled,
+            )
+            self._data.move_to_end(pk_value)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, pk_value: Any) -> None:
+        with self._lock:
+            self._data.pop(pk_value, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class DjangoCacheUserCache(UserCache):
+    """User cache backed by one of the `CACHES` configured in django."""
+
+    def __init__(
+        self, alias: str = "default", timeout: timedelta = timedelta(minutes=5)
+    ):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self) -> BaseCache:
+        return caches[self.alias]
+
+    @staticmethod
+    def make_key(pk_value: Any) -> str:
+        # hashed so that any pk value is a valid key for every backend.
+        return "gqlauth:user:" + hashlib.sha256(str(pk_value).encode()).hexdigest()
+
+    def get(self, pk_value: Any) -> UserProto | None:
+        return self.cache.get(self.make_key(pk_value))
+
+    def set(self, pk_value: Any, user: UserProto) -> None:
+        self.cache.set(self.make_key(pk_value), user, self.timeout.total_seconds())
+
+    def delete(self, pk_value: Any) -> None:
+        self.cache.delete(self.make_key(pk_value))
+
+    async def aget(self, pk_value: Any) -> UserProto | None:
+        return await self.cache.aget(self.make_key(pk_value))
+
+    async def aset(self, pk_value: Any, user: UserProto) -> None:
+        await self.cache.aset(
+            self.make_key(pk_value), user, self.timeout.total_seconds()
+        )
+
+
+def _token_generation_key(pk_value: Any) -> str:
+    return (
+        "gqlauth:token_generation:" + hashlib.sha256(str(pk_value).encode()).hexdigest()
+    )
+
+
+def _token_generation_queryset(pk_value: Any):
+    from gqlauth.models import UserStatus
+
+    pk_name = app_settings.JWT_PAYLOAD_PK.python_name
+    return UserStatus.objects.filter(**{f"user__{pk_name}": pk_value}).values_list(
+        "token_generation", flat=True
+    )
+
+
+def get_token_generation(pk_value: Any) -> int:
+    """Returns the current token generation of the user, served from the
+    `CACHE_ALIAS` cache."""
+    cache = caches[app_settings.CACHE_ALIAS]
+    key = _token_generation_key(pk_value)
+    if (generation := cache.get(key)) is None:
+        generation = _token_generation_queryset(pk_value).first() or 0
+        cache.set(key, generation)
+    return generation
+
+
+async def aget_token_generation(pk_value: Any) -> int:
+    """Async version of `get_token_generation`."""
+    cache = caches[app_settings.CACHE_ALIAS]
+    key = _token_generation_key(pk_value)
+    if (generation := await cache.aget(key)) is None:
+        generation = await _token_generation_queryset(pk_value).afirst() or 0
+        await cache.aset(key, generation)
+    return generation
+
+
+def set_token_generation(pk_value: Any, generation: int, replace=True) -> None:
+    """Caches the user's token generation, with `replace=False` only if it
+    is not cached already."""
+    cache = caches[app_settings.CACHE_ALIAS]
+    if replace:
+        cache.set(_token_generation_key(pk_value), generation)
+    else:
+        cache.add(_token_generation_key(pk_value), generation)
+
+
+async def aset_token_generation(pk_value: Any, generation: int, replace=True) -> None:
+    """Async version of `set_token_generation`."""
+    cache = caches[app_settings.CACHE_ALIAS]
+    if replace:
+        await cache.aset(_token_generation_key(pk_value), generation)
+    else:
+        await cache.aadd(_token_generation_key(pk_value), generation)
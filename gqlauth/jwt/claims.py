@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from gqlauth.core.utils import app_settings
+
+if TYPE_CHECKING:  # pragma: no cover
+    from gqlauth.core.utils import UserProto
+    from gqlauth.jwt.types_ import TokenType
+
+
+def get_user_claims(user: UserProto) -> dict[str, Any]:
+    """Returns the claims signed into the token when
+    `JWT_STATELESS_AUTHENTICATION` is on."""
+    status = user.status
+    claims = {
+        "is_active": user.is_active,
+        "verified": status.verified,
+        "archived": status.archived,
+    }
+    for name in app_settings.JWT_STATELESS_CLAIMS:
+        claims[name] = getattr(user, name)
+    return claims
+
+
+@dataclass
+class StatusClaims:
+    verified: bool
+    archived: bool
+
+
+class ClaimsUser:
+    """A lightweight user built only from the claims of a token.
+
+    Reading the `JWT_PAYLOAD_PK` field, `is_active`, `status.verified`,
+    `status.archived` and any of `JWT_STATELESS_CLAIMS` won't touch the
+    database. Any other attribute is looked up on the model instance,
+    which is loaded once on first access.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, token: TokenType):
+        claims = token.payload.claims
+        assert claims is not None, "token was not created with claims."
+        self._token = token
+        self._user: UserProto | None = None
+        pk_name = app_settings.JWT_PAYLOAD_PK.python_name
+        setattr(self, pk_name, getattr(token.payload, pk_name))
+        self.is_active = claims["is_active"]
+        self.status = StatusClaims(
+            verified=claims["verified"], archived=claims["archived"]
+        )
+        for name in app_settings.JWT_STATELESS_CLAIMS:
+            setattr(self, name, claims[name])
+
+    def get_user_instance(self) -> UserProto:
+        if self._user is None:
+            self._user = self._token.get_user_instance()
+        return self._user
+
+    def __getattr__(self, item: str) -> Any:
+        # called only for attributes that are not claims.
+        if item.startswith("__") or item in ("_token", "_user"):
+            raise AttributeError(item)
+        return getattr(self.get_user_instance(), item)
+
+    def __str__(self):
+        return str(getattr(self, app_settings.JWT_PAYLOAD_PK.python_name))
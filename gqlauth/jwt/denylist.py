@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+
+from django.db import connections
+from django.utils import timezone
+
+from gqlauth.core.utils import app_settings
+
+logger = logging.getLogger(__name__)
+
+# rows created this long before the last sync are fetched again, so that
+# rows committed late are not missed.
+SYNC_OVERLAP = timedelta(minutes=1)
+# the filter is rebuilt from scratch at this interval to drop expired tokens.
+REBUILD_INTERVAL = timedelta(hours=1)
+
+
+class BloomFilter:
+    """A fixed size Bloom filter of strings.
+
+    Sized for `capacity` items at a false positive rate of
+    `error_rate`, it never gives false negatives.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.num_bits = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.num_hashes = max(round(self.num_bits / capacity * math.log(2)), 1)
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> bool:
+        """Adds the item, returns `False` if it (or a false positive) was
+        already in the filter, in which case it isn't counted again."""
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self._bits[position >> 3] & mask:
+                self._bits[position >> 3] |= mask
+                added = True
+        self.count += added
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class TokenDenylist:
+    """Per process mirror of the `RevokedToken` table.
+
+    The `jti` of every revoked token that hasn't expired yet is kept in a
+    Bloom filter that is synced with the table every
+    `JWT_DENYLIST_REFRESH_INTERVAL` by a background thread, fetching only
+    the rows created since the last sync. A token missing from the filter
+    is not revoked, without any round trip. Only the rare hits, and every
+    check until the first sync is done, go to the table.
+    """
+
+    def __init__(self, capacity: int = 10_000):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._filter = BloomFilter(capacity)
+        self._synced_at: datetime | None = None
+        self._next_sync = 0.0
+        self._next_rebuild = 0.0
+        self._worker: threading.Thread | None = None
+
+    def _queryset(self, since: datetime | None):
+        from gqlauth.models import RevokedToken
+
+        queryset = RevokedToken.objects.filter(expires_at__gt=timezone.now())
+        if since is not None:
+            queryset = queryset.filter(created__gte=since - SYNC_OVERLAP)
+        return queryset.values_list("jti", flat=True)
+
+    def _sync_due(self) -> bool:
+        now = time.monotonic()
+        if now < self._next_sync:
+            return False
+        self._next_sync = (
+            now + app_settings.JWT_DENYLIST_REFRESH_INTERVAL.total_seconds()
+        )
+        return True
+
+    def _sync_since(self) -> datetime | None:
+        """From when rows should be fetched, `None` for a rebuild."""
+        now = time.monotonic()
+        if now >= self._next_rebuild:
+            self._next_rebuild = now + REBUILD_INTERVAL.total_seconds()
+            return None
+        return self._synced_at
+
+    def _apply(
+        self, jtis: list[str], since: datetime | None, synced_at: datetime
+    ) -> bool:
+        """Returns `False` if the filter would outgrow its capacity, it has to
+        be rebuilt then."""
+        with self._lock:
+            if since is None:
+                self._filter = BloomFilter(max(self.capacity, len(jtis) * 2))
+            # rows from the overlap window are fetched again, they are only
+            # counted once.
+            for jti in jtis:
+                self._filter.add(jti)
+            if since is not None and self._filter.count > self._filter.capacity:
+                return False
+            self._synced_at = synced_at
+            return True
+
+    def sync(self) -> None:
+        if not self._sync_due():
+            return
+        since, synced_at = self._sync_since(), timezone.now()
+        if not self._apply(list(self._queryset(since)), since, synced_at):
+            self._apply(list(self._queryset(None)), None, synced_at)
+
+    def _sync_in_background(self) -> None:
+        try:
+            self.sync()
+        except Exception:
+            logger.exception("Failed to sync the token denylist.")
+        finally:
+            # connections are per thread, this one is done with its own.
+            connections.close_all()
+
+    def schedule_sync(self) -> None:
+        """Starts a sync in a background thread if one is due, checks keep
+        using the current filter meanwhile."""
+        with self._lock:
+            if time.monotonic() < self._next_sync or (
+                self._worker is not None and self._worker.is_alive()
+            ):
+                return
+            self._worker = threading.Thread(
+                target=self._sync_in_background,
+                name="gqlauth-denylist-sync",
+                daemon=True,
+            )
+            self._worker.start()
+
+    def add(self, jti: str) -> None:
+        """Adds the token locally, other processes pick it up on their next
+        sync."""
+        with self._lock:
+            self._filter.add(jti)
+
+    def is_revoked(self, jti: str) -> bool:
+        from gqlauth.models import RevokedToken
+
+        self.schedule_sync()
+        if self._synced_at is not None and jti not in self._filter:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    async def ais_revoked(self, jti: str) -> bool:
+        from gqlauth.models import RevokedToken
+
+        self.schedule_sync()
+        if self._synced_at is not None and jti not in self._filter:
+            return False
+        return await RevokedToken.objects.filter(jti=jti).aexists()
+
+    def reset(self) -> None:
+        if (worker := self._worker) is not None:
+            worker.join()
+        with self._lock:
+            self._filter = BloomFilter(self.capacity)
+            self._synced_at = None
+            self._next_sync = self._next_rebuild = 0.0
+
+
+_denylist: TokenDenylist | None = None
+
+
+def get_token_denylist() -> TokenDenylist | None:
+    """Returns the process-wide denylist, or `None` if `JWT_DENYLIST` is
+    off."""
+    global _denylist
+    if not app_settings.JWT_DENYLIST:
+        return None
+    if _denylist is None:
+        _denylist = TokenDenylist()
+    return _denylist
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+
+import jwt
+from jwt.algorithms import get_default_algorithms
+
+UNKNOWN_KID_RELOAD_INTERVAL = 10  # seconds
+
+
+@dataclass(frozen=True)
+class JWTKey:
+    """A key of the key ring.
+
+    Asymmetric keys are PEM strings (HMAC keys are the secret itself).
+    `private_key` is only needed on the nodes that create tokens,
+    `public_key` can be omitted if the private key is given.
+    """
+
+    kid: str
+    algorithm: str
+    private_key: str | None = None
+    public_key: str | None = None
+
+
+class KeyRing:
+    """Set of keys used to sign and verify tokens, selected by the `kid`
+    header.
+
+    `loader` returns the current keys. The first key with a private key is
+    used for signing, all of them are accepted for verification. The loader is
+    called again every `refresh_interval` (or when an unknown `kid` shows up),
+    so keys can be rotated without a restart. Parsed key objects are cached
+    per process and are reused as long as the key material is unchanged.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Sequence[JWTKey]],
+        refresh_interval: timedelta = timedelta(minutes=5),
+    ):
+        self.loader = loader
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._loaded_at: float | None = None
+        self._keys: dict[str, JWTKey] = {}
+        self._signing_kid: str | None = None
+        self._parsed: dict[JWTKey, tuple[Any, Any]] = {}
+
+    @classmethod
+    def from_keys(cls, keys: Sequence[JWTKey]) -> KeyRing:
+        return cls(loader=lambda: keys)
+
+    @staticmethod
+    def _parse(key: JWTKey) -> tuple[Any, Any]:
+        algorithm = get_default_algorithms()[key.algorithm]
+        private = algorithm.prepare_key(key.private_key) if key.private_key else None
+        if key.public_key:
+            public = algorithm.prepare_key(key.public_key)
+        elif private is not None and hasattr(private, "public_key"):
+            public = private.public_key()
+        else:  # HMAC
+            public = private
+        return private, public
+
+    def reload(self) -> None:
+        keys = self.loader()
+        with self._lock:
+            parsed = {key: self._parsed.get(key) or self._parse(key) for key in keys}
+            self._parsed = parsed  # type: ignore
+            self._keys = {key.kid: key for key in keys}
+            self._signing_kid = next((key.kid for key in keys if key.private_key), None)
+            self._loaded_at = time.monotonic()
+
+    def _is_stale(self, max_age: float) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > max_age
+
+    def _reload_if_stale(self, max_age: float) -> None:
+        if not self._is_stale(max_age):
+            return
+        # only one thread calls the loader, the others wait for its keys.
+        with self._reload_lock:
+            if self._is_stale(max_age):
+                self.reload()
+
+    def _ensure_fresh(self) -> None:
+        self._reload_if_stale(self.refresh_interval.total_seconds())
+
+    def signing_key(self) -> tuple[JWTKey, Any]:
+        self._ensure_fresh()
+        if self._signing_kid is None:
+            raise jwt.InvalidKeyError("The key ring has no private key to sign with.")
+        key = self._keys[self._signing_kid]
+        return key, self._parsed[key][0]
+
+    def verification_key(self, kid: str) -> tuple[JWTKey, Any]:
+        self._ensure_fresh()
+        if kid not in self._keys:
+            # might have just been rotated in, reloading at most once in a while
+            # so that forged key ids can't hammer the loader.
+            self._reload_if_stale(UNKNOWN_KID_RELOAD_INTERVAL)
+            if kid not in self._keys:
+                raise jwt.InvalidKeyError(f"Unknown key id {kid!r}.")
+        key = self._keys[kid]
+        return key, self._parsed[key][1]
+
+    def public_keys(self) -> list[tuple[JWTKey, Any]]:
+        self._ensure_fresh()
+        return [(key, parsed[1]) for key, parsed in self._parsed.items()]
+
+
+def encode_jwt(payload: dict) -> str:
+    """Signs `payload` with the signing key of `JWT_KEY_RING`, or with
+    `JWT_SECRET_KEY` if there is no key ring."""
+    from gqlauth.core.utils import app_settings
+
+    if (key_ring := app_settings.JWT_KEY_RING) is not None:
+        key, key_obj = key_ring.signing_key()
+        return jwt.encode(
+            payload, key=key_obj, algorithm=key.algorithm, headers={"kid": key.kid}
+        )
+    return jwt.encode(
+        payload,
+        key=app_settings.JWT_SECRET_KEY.value,
+        algorithm=app_settings.JWT_ALGORITHM,
+    )
+
+
+def decode_jwt_claims(token: str) -> dict:
+    """Verifies the token against the key its `kid` header refers to.
+
+    Without a key ring tokens are verified with `JWT_SECRET_KEY`. With one,
+    tokens without `kid` are rejected unless `JWT_KEY_RING_ALLOW_SECRET_KEY`
+    is on.
+    """
+    from gqlauth.core.utils import app_settings
+
+    key_ring = app_settings.JWT_KEY_RING
+    if key_ring is not None:
+        if kid := jwt.get_unverified_header(token).get("kid"):
+            key, key_obj = key_ring.verification_key(kid)
+            return jwt.decode(token, key=key_obj, algorithms=[key.algorithm])
+        if not app_settings.JWT_KEY_RING_ALLOW_SECRET_KEY:
+            raise jwt.InvalidTokenError("The token has no key id.")
+    return jwt.decode(
+        token,
+        key=app_settings.JWT_SECRET_KEY.value,
+        algorithms=[
+            app_settings.JWT_ALGORITHM,
+        ],
+    )
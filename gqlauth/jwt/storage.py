@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import contextlib
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from django.core.cache import BaseCache, caches
+from django.db import transaction
+from django.utils import timezone
+
+if TYPE_CHECKING:  # pragma: no cover
+    from gqlauth.core.utils import UserProto
+    from gqlauth.models import RefreshToken
+
+
+class RefreshTokenStorage(ABC):
+    """Where `JWT_REFRESH_TOKEN_STORAGE` keeps refresh tokens.
+
+    Tokens are handed around as `gqlauth.models.RefreshToken` instances,
+    unsaved ones for storages other than the database, and are found by the
+    sha256 digest of the raw token, which must never be stored. `revoke`
+    and `revoke_user` have to be atomic, concurrent rotations of a token
+    rely on only one `revoke` succeeding.
+    """
+
+    @abstractmethod
+    def create(self, user: UserProto) -> RefreshToken:
+        """Stores a new token of the user, with the user's current token
+        generation, and returns it with the raw `token` set."""
+
+    def get(self, token: str, for_update: bool = False) -> RefreshToken | None:
+        """Returns the token (revoked or not) with its user and the user's
+        status loaded, or `None` if there is no such token.
+
+        `for_update` is passed inside `atomic()` when the token is about
+        to be rotated.
+        """
+        from gqlauth.models import RefreshToken
+
+        obj = self.get_by_hash(RefreshToken.hash_token(token), for_update=for_update)
+        if obj is not None:
+            obj.token = token
+        return obj
+
+    @abstractmethod
+    def get_by_hash(
+        self, token_hash: str, for_update: bool = False
+    ) -> RefreshToken | None:
+        """Like `get`, by the digest of the token, the returned token has no
+        raw `token`."""
+
+    @abstractmethod
+    def revoke(self, refresh_token: RefreshToken) -> bool:
+        """Revokes the token and sets its `revoked` date, returns whether this
+        very call revoked it."""
+
+    @abstractmethod
+    def revoke_user(self, user: UserProto) -> int | None:
+        """Revokes all the tokens of the user, returns how many were revoked
+        or `None` if the storage can't tell."""
+
+    def atomic(self) -> contextlib.AbstractContextManager:
+        """A transaction that `get(for_update=True)` and the rotation run in,
+        nothing by default."""
+        return contextlib.nullcontext()
+
+
+class DatabaseRefreshTokenStorage(RefreshTokenStorage):
+    """Keeps refresh tokens in the `RefreshToken` table."""
+
+    def create(self, user: UserProto) -> RefreshToken:
+        from gqlauth.core.utils import app_settings
+        from gqlauth.models import RefreshToken
+
+        token = RefreshToken.generate_token()
+        max_active = app_settings.JWT_MAX_ACTIVE_REFRESH_TOKENS_PER_USER
+        with transaction.atomic() if max_active else contextlib.nullcontext():
+            obj = RefreshToken.objects.create(
+                user=user,
+                token_hash=RefreshToken.hash_token(token),
+                generation=user.status.token_generation,
+            )
+            if max_active:
+                # evict the oldest ones, materialized since not every database
+                # supports LIMIT in a subquery.
+                oldest = list(
+                    RefreshToken.objects.filter(user=user)
+                    .active()
+                    .order_by("-expires_at", "-pk")
+                    .values_list("pk", flat=True)[max_active:]
+                )
+                if oldest:
+                    RefreshToken.objects.filter(pk__in=oldest).revoke()
+        obj.token = token
+        return obj
+
+    def get_by_hash(
+        self, token_hash: str, for_update: bool = False
+    ) -> RefreshToken | None:
+        from gqlauth.models import RefreshToken
+
+        queryset = RefreshToken.objects.select_related("user", "user__status")
+        if for_update:
+            queryset = queryset.select_for_update(of=("self",))
+        try:
+            return queryset.get(token_hash=token_hash)
+        except RefreshToken.DoesNotExist:
+            return None
+
+    def revoke(self, refresh_token: RefreshToken) -> bool:
+        from gqlauth.models import RefreshToken
+
+        # a conditional update, so that only one caller wins even where the
+        # database can't lock the row.
+        if RefreshToken.objects.filter(pk=refresh_token.pk).revoke():
+            refresh_token.revoked = timezone.now()
+            return True
+        refresh_token.refresh_from_db(fields=["revoked"])
+        return False
+
+    def revoke_user(self, user: UserProto) -> int:
+        return user.refresh_tokens.revoke()  # type: ignore
+
+    def atomic(self) -> contextlib.AbstractContextManager:
+        return transaction.atomic(savepoint=False)
+
+
+class DjangoCacheRefreshTokenStorage(RefreshTokenStorage):
+    """Keeps refresh tokens in one of the `CACHES` configured in django,
+    expiring with the token.
+
+    Revoking all the tokens of a user stores a single per-user timestamp,
+    tokens created before it are revoked. Make sure the cache doesn't evict
+    keys before they expire, or revocations could be lost.
+    """
+
+    def __init__(self, alias: str | None = None):
+        self.alias = alias
+
+    @property
+    def cache(self) -> BaseCache:
+        from gqlauth.core.utils import app_settings
+
+        return caches[self.alias or app_settings.CACHE_ALIAS]
+
+    @staticmethod
+    def _token_key(token_hash: str) -> str:
+        return f"gqlauth:refresh_token:{token_hash}"
+
+    @staticmethod
+    def _revoked_key(token_hash: str) -> str:
+        return f"gqlauth:refresh_token:revoked:{token_hash}"
+
+    @staticmethod
+    def _user_revoked_key(user_pk: Any) -> str:
+        return f"gqlauth:refresh_token:user_revoked:{user_pk}"
+
+    @staticmethod
+    def _ttl(expires_at: datetime) -> float:
+        return max((expires_at - timezone.now()).total_seconds(), 1)
+
+    def create(self, user: UserProto) -> RefreshToken:
+        from gqlauth.models import RefreshToken
+
+        token = RefreshToken.generate_token()
+        obj = RefreshToken(
+            user=user,
+            token_hash=RefreshToken.hash_token(token),
+            created=timezone.now(),
+            generation=user.status.token_generation,
+        )
+        obj.token = token
+        self.cache.set(
+            self._token_key(obj.token_hash),
+            {
+                "user_pk": user.pk,
+                "created": obj.created,
+                "expires_at": obj.expires_at,
+                "generation": obj.generation,
+            },
+            self._ttl(obj.expires_at),
+        )
+        return obj
+
+    def get_by_hash(
+        self, token_hash: str, for_update: bool = False
+    ) -> RefreshToken | None:
+        from gqlauth.core.utils import USER_MODEL
+        from gqlauth.models import RefreshToken
+
+        token_key, revoked_key = (
+            self._token_key(token_hash),
+            self._revoked_key(token_hash),
+        )
+        found = self.cache.get_many([token_key, revoked_key])
+        if (data := found.get(token_key)) is None:
+            return None
+        try:
+            user = USER_MODEL._default_manager.select_related("status").get(
+                pk=data["user_pk"]
+            )
+        except USER_MODEL.DoesNotExist:
+            return None
+        obj = RefreshToken(
+            user=user,
+            token_hash=token_hash,
+            created=data["created"],
+            expires_at=data["expires_at"],
+            revoked=found.get(revoked_key),
+            generation=data["generation"],
+        )
+        if obj.revoked is None:
+            user_revoked = self.cache.get(self._user_revoked_key(user.pk))
+            if user_revoked is not None and obj.created <= user_revoked:
+                obj.revoked = user_revoked
+        return obj
+
+    def revoke(self, refresh_token: RefreshToken) -> bool:
+        now = timezone.now()
+        # `add` is atomic, only the first caller sets the marker.
+        if self.cache.add(
+            self._revoked_key(refresh_token.token_hash),
+            now,
+            self._ttl(refresh_token.expires_at),
+        ):
+            refresh_token.revoked = now
+            return True
+        refresh_token.revoked = self.cache.get(
+            self._revoked_key(refresh_token.token_hash), now
+        )
+        return False
+
+    def revoke_user(self, user: UserProto) -> None:
+        from gqlauth.core.utils import app_settings
+
+        # by the time it expires all the tokens created before it are expired.
+        self.cache.set(
+            self._user_revoked_key(user.pk),
+            timezone.now(),
+            app_settings.JWT_REFRESH_EXPIRATION_DELTA.total_seconds(),
+        )
@@ -1,5 +1,5 @@
 import dataclasses
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import TYPE_CHECKING, Optional, cast
 from uuid import UUID
 
@@ -8,14 +8,22 @@ import strawberry_django
 from django.contrib.auth import authenticate
 from django.core.exceptions import PermissionDenied
 from django.utils.timezone import localtime
+from jwt import MissingRequiredClaimError, PyJWTError
 from strawberry import auto
 from strawberry.types import Info
 
 from gqlauth.core.constants import Messages
-from gqlauth.core.exceptions import TokenExpired
+from gqlauth.core.exceptions import TokenDenylisted, TokenExpired, TokenRevoked
 from gqlauth.core.interfaces import OutputInterface
 from gqlauth.core.scalars import ExpectedErrorType
 from gqlauth.core.utils import USER_MODEL, app_settings, inject_fields, utc_now
+from gqlauth.jwt.cache import (
+    aget_token_generation,
+    aset_token_generation,
+    get_token_cache,
+    get_token_generation,
+    set_token_generation,
+)
 from gqlauth.models import RefreshToken
 from gqlauth.user.types_ import UserType
 
@@ -33,16 +41,14 @@ when the token expires.
 """,
 )
 class RefreshTokenType:
-    token: auto = strawberry_django.field(
+    token: Optional[str] = strawberry_django.field(
         description="randomly generated token that is attached to a FK user."
+        " Only a digest of it is stored, so it is returned only when the token"
+        " is issued (or presented), and is null otherwise."
     )
     created: auto
     revoked: auto
-
-    @strawberry_django.field
-    def expires_at(self) -> datetime:
-        self: RefreshToken  # type: ignore
-        return self.expires_at_()  # type: ignore
+    expires_at: auto
 
     @strawberry_django.field
     def is_expired(self) -> bool:
@@ -67,6 +73,9 @@ class TokenPayloadType:
     exp: datetime = strawberry.field(
         description="when the token will be expired", default=None
     )
+    claims: strawberry.Private[dict | None] = None
+    generation: strawberry.Private[int] = 0
+    jti: strawberry.Private[str | None] = None
 
     def __post_init__(self):
         if not self.exp:
@@ -80,9 +89,53 @@ class TokenPayloadType:
                 ret[field.name] = value.strftime(app_settings.JWT_TIME_FORMAT)
         return ret
 
+    def as_claims(self) -> dict:
+        """Returns the flat, numeric date claims used by the compact payload
+        format (see `JWT_COMPACT_PAYLOAD`)."""
+        pk_name = app_settings.JWT_PAYLOAD_PK.python_name
+        ret = {
+            "sub": str(getattr(self, pk_name)),
+            "iat": int(self.origIat.timestamp()),
+            "exp": int(self.exp.timestamp()),
+        }
+        if self.claims is not None:
+            ret["claims"] = self.claims
+        if self.generation:
+            ret["gen"] = self.generation
+        if self.jti is not None:
+            ret["jti"] = self.jti
+        return ret
+
+    @staticmethod
+    def pk_from_claim(sub: str):
+        """Converts the `sub` claim back to the type of the user field, so
+        that it matches what legacy tokens and model instances carry."""
+        pk_name = app_settings.JWT_PAYLOAD_PK.python_name
+        return USER_MODEL._meta.get_field(pk_name).to_python(sub)
+
+    @classmethod
+    def from_claims(cls, claims: dict) -> "TokenPayloadType":
+        for claim in ("sub", "iat", "exp"):
+            if claim not in claims:
+                raise MissingRequiredClaimError(claim)
+        pk_name = app_settings.JWT_PAYLOAD_PK.python_name
+        return cls(
+            **{pk_name: cls.pk_from_claim(claims["sub"])},
+            origIat=datetime.fromtimestamp(claims["iat"], tz=timezone.utc),
+            exp=datetime.fromtimestamp(claims["exp"], tz=timezone.utc),
+            claims=claims.get("claims"),
+            generation=claims.get("gen", 0),
+            jti=claims.get("jti"),
+        )
+
     @classmethod
     def from_dict(cls, data: dict) -> "TokenPayloadType":
         for field in dataclasses.fields(cls):  # type: ignore
+            if field.name not in data:
+                # tokens issued before these were added don't carry them.
+                if field.name in ("claims", "generation", "jti"):
+                    continue
+                raise MissingRequiredClaimError(field.name)
             value = data[field.name]
             if isinstance(value, str) and field.type is datetime:
                 data[field.name] = datetime.strptime(
@@ -103,6 +156,41 @@ class TokenType:
     def is_expired(self):
         return self.payload.exp < utc_now()
 
+    def check_generation(self, generation: int) -> None:
+        """Raises `TokenRevoked` if the token is older than the user's
+        current token generation."""
+        if self.payload.generation < generation:
+            raise TokenRevoked
+
+    def check_revoked(self) -> None:
+        """Raises `TokenDenylisted` if the token is on the denylist (see
+        `JWT_DENYLIST`)."""
+        from gqlauth.jwt.denylist import get_token_denylist
+
+        if (denylist := get_token_denylist()) is not None and self.payload.jti:
+            if denylist.is_revoked(self.payload.jti):
+                raise TokenDenylisted
+
+    async def acheck_revoked(self) -> None:
+        """Async version of `check_revoked`."""
+        from gqlauth.jwt.denylist import get_token_denylist
+
+        if (denylist := get_token_denylist()) is not None and self.payload.jti:
+            if await denylist.ais_revoked(self.payload.jti):
+                raise TokenDenylisted
+
+    def revoke(self) -> None:
+        """Adds the token to the denylist (see `JWT_DENYLIST`)."""
+        from gqlauth.jwt.denylist import get_token_denylist
+        from gqlauth.models import RevokedToken
+
+        assert self.payload.jti, "token was created without a jti."
+        RevokedToken.objects.get_or_create(
+            jti=self.payload.jti, defaults={"expires_at": self.payload.exp}
+        )
+        if (denylist := get_token_denylist()) is not None:
+            denylist.add(self.payload.jti)
+
     @classmethod
     def from_user(cls, user: "UserProto") -> "TokenType":
         return app_settings.JWT_PAYLOAD_HANDLER(user)
@@ -110,16 +198,65 @@ class TokenType:
     @classmethod
     def from_token(cls, token: str) -> "TokenType":
         """Might raise TokenExpired."""
+        cache = get_token_cache()
+        if cache is not None and (cached := cache.get(token)):
+            return cached
         token_type: TokenType = app_settings.JWT_DECODE_HANDLER(token)
         if token_type.is_expired():
             raise TokenExpired
+        if cache is not None:
+            cache.set(token_type)
         return token_type
 
     def get_user_instance(self) -> "UserProto":
         """Might raise not existed exception."""
         pk_name = app_settings.JWT_PAYLOAD_PK.python_name
-        query = {pk_name: getattr(self.payload, pk_name)}
-        return USER_MODEL.objects.get(**query)  # type: ignore
+        pk_value = getattr(self.payload, pk_name)
+        cache = app_settings.JWT_USER_CACHE
+        user = cache.get(pk_value) if cache is not None else None
+        # the user may have been cached before tokens were revoked elsewhere.
+        if user is not None and user.status.token_generation < get_token_generation(
+            pk_value
+        ):
+            user = None
+        if user is None:
+            user = USER_MODEL.objects.select_related("status").get(
+                **{pk_name: pk_value}
+            )
+            if cache is not None:
+                cache.set(pk_value, user)  # type: ignore
+                # so that cache hits won't have to query it.
+                set_token_generation(
+                    pk_value,
+                    user.status.token_generation,  # type: ignore
+                    replace=False,
+                )
+        self.check_generation(user.status.token_generation)  # type: ignore
+        return user  # type: ignore
+
+    async def aget_user_instance(self) -> "UserProto":
+        """Async version of `get_user_instance`."""
+        pk_name = app_settings.JWT_PAYLOAD_PK.python_name
+        pk_value = getattr(self.payload, pk_name)
+        cache = app_settings.JWT_USER_CACHE
+        user = await cache.aget(pk_value) if cache is not None else None
+        if user is not None and (
+            user.status.token_generation < await aget_token_generation(pk_value)
+        ):
+            user = None
+        if user is None:
+            user = await USER_MODEL.objects.select_related("status").aget(
+                **{pk_name: pk_value}
+            )
+            if cache is not None:
+                await cache.aset(pk_value, user)  # type: ignore
+                await aset_token_generation(
+                    pk_value,
+                    user.status.token_generation,  # type: ignore
+                    replace=False,
+                )
+        self.check_generation(user.status.token_generation)  # type: ignore
+        return user  # type: ignore
 
 
 @strawberry.input
@@ -129,6 +266,7 @@ class ObtainJSONWebTokenInput:
     if app_settings.LOGIN_REQUIRE_CAPTCHA:
         identifier: UUID
         userEntry: str
+        challenge: str | None = None
 
 
 @strawberry.type(
@@ -228,9 +366,12 @@ class VerifyTokenType(OutputInterface):
     def from_token(cls, token_input: VerifyTokenInput) -> "VerifyTokenType":
         try:
             token_type = TokenType.from_token(token_input.token)
+            token_type.check_revoked()
             user = token_type.get_user_instance()
         except USER_MODEL.DoesNotExist:
             return VerifyTokenType(success=False, errors=Messages.INVALID_CREDENTIALS)
+        except TokenDenylisted:
+            return VerifyTokenType(success=False, errors=Messages.REVOKED_TOKEN)
         except TokenExpired:
             return VerifyTokenType(success=False, errors=Messages.EXPIRED_TOKEN)
 
@@ -240,6 +381,78 @@ class VerifyTokenType(OutputInterface):
             )
 
 
+@strawberry.input
+class VerifyTokensInput:
+    tokens: list[str]
+
+
+@strawberry.type
+class VerifyTokensType(OutputInterface):
+    success: bool
+    results: list[VerifyTokenType] = strawberry.field(
+        description="verification result for each token, in the given order."
+    )
+    errors: ExpectedErrorType | None = None
+
+    @classmethod
+    def from_tokens(cls, tokens_input: VerifyTokensInput) -> "VerifyTokensType":
+        """Decodes all the tokens and fetches all the referenced users with a
+        single query."""
+        if len(tokens_input.tokens) > app_settings.JWT_VERIFY_TOKENS_MAX_BATCH:
+            return VerifyTokensType(
+                success=False, results=[], errors=Messages.TOO_MANY_TOKENS
+            )
+        pk_name = app_settings.JWT_PAYLOAD_PK.python_name
+        decoded: list[TokenType | VerifyTokenType] = []
+        for token in tokens_input.tokens:
+            try:
+                token_type = TokenType.from_token(token)
+                token_type.check_revoked()
+                decoded.append(token_type)
+            except TokenDenylisted:
+                decoded.append(
+                    VerifyTokenType(success=False, errors=Messages.REVOKED_TOKEN)
+                )
+            except TokenExpired:
+                decoded.append(
+                    VerifyTokenType(success=False, errors=Messages.EXPIRED_TOKEN)
+                )
+            except PyJWTError:
+                decoded.append(
+                    VerifyTokenType(success=False, errors=Messages.INVALID_TOKEN)
+                )
+        pk_values = {
+            getattr(item.payload, pk_name)
+            for item in decoded
+            if isinstance(item, TokenType)
+        }
+        users = {
+            getattr(user, pk_name): user
+            for user in USER_MODEL.objects.select_related("status").filter(
+                **{f"{pk_name}__in": pk_values}
+            )
+        }
+        results = []
+        for item in decoded:
+            if isinstance(item, VerifyTokenType):
+                results.append(item)
+            elif (user := users.get(getattr(item.payload, pk_name))) and (
+                item.payload.generation < user.status.token_generation
+            ):
+                results.append(
+                    VerifyTokenType(success=False, errors=Messages.EXPIRED_TOKEN)
+                )
+            elif user:
+                results.append(
+                    VerifyTokenType(token=item, user=cast(UserType, user), success=True)
+                )
+            else:
+                results.append(
+                    VerifyTokenType(success=False, errors=Messages.INVALID_CREDENTIALS)
+                )
+        return VerifyTokensType(success=True, results=results)
+
+
 @strawberry.type
 class RevokeRefreshTokenType:
     success: bool
@@ -0,0 +1,42 @@
+import hashlib
+import json
+
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_GET
+from jwt.algorithms import get_default_algorithms
+
+from gqlauth.core.utils import app_settings
+
+
+def get_jwks() -> dict:
+    """Returns the public keys of `JWT_KEY_RING` as a JWK set.
+
+    Symmetric (HMAC) keys are never published.
+    """
+    keys = []
+    if (key_ring := app_settings.JWT_KEY_RING) is not None:
+        for key, public_key in key_ring.public_keys():
+            if key.algorithm.startswith("HS"):
+                continue
+            algorithm = get_default_algorithms()[key.algorithm]
+            jwk = json.loads(algorithm.to_jwk(public_key))
+            jwk.update(kid=key.kid, alg=key.algorithm, use="sig")
+            keys.append(jwk)
+    return {"keys": keys}
+
+
+@require_GET
+def jwks(request: HttpRequest) -> HttpResponse:
+    """Publishes the public key ring, i.e at `/.well-known/jwks.json`, so that
+    other services can verify tokens locally."""
+    body = json.dumps(get_jwks(), sort_keys=True)
+    etag = f'"{hashlib.sha256(body.encode()).hexdigest()}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    patch_cache_control(
+        response, public=True, max_age=int(app_settings.JWKS_MAX_AGE.total_seconds())
+    )
+    return response
@@ -0,0 +1,87 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from gqlauth.models import RefreshToken, RevokedToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes refresh tokens that are expired or were revoked a while ago, "
+        "and expired entries of the access token denylist. "
+        "Rows are deleted in small primary key ranges so that it is safe "
+        "to run against a busy table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--revoked-days",
+            type=int,
+            default=7,
+            help="Delete tokens revoked more than this many days ago (default: 7).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Maximum number of rows deleted per query (default: 1000).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Seconds to sleep between batches (default: 0.1).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many tokens would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        # cutoffs are fixed up front so that the batches agree on what to delete.
+        purgeable = Q(expires_at__lt=now) | Q(
+            revoked__lt=now - timedelta(days=options["revoked_days"])
+        )
+        self.purge(RefreshToken.objects.filter(purgeable), "refresh tokens", options)
+        self.purge(
+            RevokedToken.objects.filter(expires_at__lt=now),
+            "denylisted tokens",
+            options,
+        )
+
+    def purge(self, queryset, label: str, options) -> None:
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+        total = 0
+        last_pk = None
+        while True:
+            candidates = queryset.order_by("pk")
+            if last_pk is not None:
+                candidates = candidates.filter(pk__gt=last_pk)
+            pks = list(candidates.values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                break
+            batch = queryset.filter(pk__gte=pks[0], pk__lte=pks[-1])
+            if dry_run:
+                count = len(pks)
+            else:
+                count, _ = batch.delete()
+            total += count
+            last_pk = pks[-1]
+            self.stdout.write(
+                f"{'Would delete' if dry_run else 'Deleted'} {count} {label} "
+                f"(ids {pks[0]}-{pks[-1]}), {total} so far."
+            )
+            if len(pks) < batch_size:
+                break
+            time.sleep(options["sleep"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'Would delete' if dry_run else 'Deleted'} {total} {label}."
+            )
+        )
@@ -0,0 +1,43 @@
+from django.db import migrations, models
+
+
+def delete_tokens_without_raw_token(apps, schema_editor):
+    RefreshToken = apps.get_model("gqlauth", "RefreshToken")
+    RefreshToken.objects.filter(token__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+    """Adds the digest column, filled by the next migration.
+
+    Both changes only touch the table's metadata, and `token` becomes
+    nullable so that new code can insert refresh tokens before the column is
+    dropped.
+
+    Raw tokens can't be recovered from their digests, so reversing it
+    deletes the refresh tokens without one before `token` is made NOT NULL
+    again, their users have to log in again.
+    """
+
+    dependencies = [
+        ("gqlauth", "0004_captcha"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="refreshtoken",
+            name="token_hash",
+            field=models.CharField(
+                editable=False, max_length=64, null=True, verbose_name="token hash"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="refreshtoken",
+            name="token",
+            field=models.CharField(
+                editable=False, max_length=255, null=True, verbose_name="token"
+            ),
+        ),
+        migrations.RunPython(
+            migrations.RunPython.noop, delete_tokens_without_raw_token
+        ),
+    ]
@@ -0,0 +1,39 @@
+import hashlib
+
+from django.db import migrations, transaction
+
+BATCH_SIZE = 1000
+
+
+def hash_tokens(apps, schema_editor):
+    """Fills `token_hash` in small primary key ordered batches, each committed
+    on its own so that the table is never locked for long."""
+    RefreshToken = apps.get_model("gqlauth", "RefreshToken")
+    pending = RefreshToken.objects.filter(
+        token_hash__isnull=True, token__isnull=False
+    ).order_by("pk")
+    last_pk = None
+    while True:
+        batch = pending if last_pk is None else pending.filter(pk__gt=last_pk)
+        batch = list(batch.only("pk", "token")[:BATCH_SIZE])
+        if not batch:
+            break
+        for refresh_token in batch:
+            refresh_token.token_hash = hashlib.sha256(
+                refresh_token.token.encode()
+            ).hexdigest()
+        with transaction.atomic():
+            RefreshToken.objects.bulk_update(batch, ["token_hash"])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("gqlauth", "0005_refreshtoken_token_hash"),
+    ]
+
+    operations = [
+        migrations.RunPython(hash_tokens, migrations.RunPython.noop),
+    ]
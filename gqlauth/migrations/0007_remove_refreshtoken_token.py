@@ -0,0 +1,45 @@
+import importlib
+
+from django.db import migrations, models
+
+
+def hash_remaining_tokens(apps, schema_editor):
+    # tokens created by old code since the backfill ran.
+    backfill = importlib.import_module(
+        "gqlauth.migrations.0006_backfill_refreshtoken_token_hash"
+    )
+    backfill.hash_tokens(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+    """Drops the raw tokens and makes the digest unique.
+
+    Reversing it brings back an empty, nullable `token` column: the raw
+    tokens can't be recovered from their digests (see `0005`).
+
+    On PostgreSQL, building the unique index blocks writes to the table
+    while it runs.
+    """
+
+    dependencies = [
+        ("gqlauth", "0006_backfill_refreshtoken_token_hash"),
+    ]
+
+    operations = [
+        migrations.RunPython(hash_remaining_tokens, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name="refreshtoken",
+            unique_together=set(),
+        ),
+        migrations.RemoveField(
+            model_name="refreshtoken",
+            name="token",
+        ),
+        migrations.AlterField(
+            model_name="refreshtoken",
+            name="token_hash",
+            field=models.CharField(
+                editable=False, max_length=64, unique=True, verbose_name="token hash"
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Adds the nullable column, filled by the next migration."""
+
+    dependencies = [
+        ("gqlauth", "0007_remove_refreshtoken_token"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="refreshtoken",
+            name="expires_at",
+            field=models.DateTimeField(null=True, verbose_name="expires at"),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.db.models import F
+
+BATCH_SIZE = 1000
+
+
+def set_expires_at(apps, schema_editor):
+    """Fills `expires_at` in small primary key ranges, each update committed
+    on its own so that the table is never locked for long."""
+    from gqlauth.settings import gqlauth_settings
+
+    RefreshToken = apps.get_model("gqlauth", "RefreshToken")
+    pending = RefreshToken.objects.filter(expires_at__isnull=True)
+    last_pk = None
+    while True:
+        candidates = pending.order_by("pk")
+        if last_pk is not None:
+            candidates = candidates.filter(pk__gt=last_pk)
+        pks = list(candidates.values_list("pk", flat=True)[:BATCH_SIZE])
+        if not pks:
+            break
+        pending.filter(pk__gte=pks[0], pk__lte=pks[-1]).update(
+            expires_at=F("created") + gqlauth_settings.JWT_REFRESH_EXPIRATION_DELTA
+        )
+        last_pk = pks[-1]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("gqlauth", "0008_refreshtoken_expires_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(set_expires_at, migrations.RunPython.noop),
+    ]
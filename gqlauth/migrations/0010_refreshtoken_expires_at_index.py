@@ -0,0 +1,45 @@
+import importlib
+
+from django.db import migrations, models
+
+import gqlauth.models
+
+
+def set_remaining_expires_at(apps, schema_editor):
+    # tokens created by old code since the backfill ran.
+    backfill = importlib.import_module(
+        "gqlauth.migrations.0009_backfill_refreshtoken_expires_at"
+    )
+    backfill.set_expires_at(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+    """Makes `expires_at` required and indexes active tokens.
+
+    On PostgreSQL, setting NOT NULL scans the table and building the index
+    blocks writes to it while they run, but neither rewrites any rows.
+    """
+
+    dependencies = [
+        ("gqlauth", "0009_backfill_refreshtoken_expires_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(set_remaining_expires_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="refreshtoken",
+            name="expires_at",
+            field=models.DateTimeField(
+                default=gqlauth.models._refresh_token_expiry,
+                verbose_name="expires at",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="refreshtoken",
+            index=models.Index(
+                condition=models.Q(("revoked__isnull", True)),
+                fields=["user", "expires_at"],
+                name="gqlauth_refresh_token_active",
+            ),
+        ),
+    ]
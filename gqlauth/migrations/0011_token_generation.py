@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gqlauth", "0010_refreshtoken_expires_at_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="refreshtoken",
+            name="generation",
+            field=models.PositiveIntegerField(default=0, verbose_name="generation"),
+        ),
+        migrations.AddField(
+            model_name="userstatus",
+            name="token_generation",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
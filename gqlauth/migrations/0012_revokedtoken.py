@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gqlauth", "0011_token_generation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RevokedToken",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "jti",
+                    models.CharField(max_length=64, unique=True, verbose_name="jti"),
+                ),
+                (
+                    "expires_at",
+                    models.DateTimeField(db_index=True, verbose_name="expires at"),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, db_index=True, verbose_name="created"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "revoked token",
+                "verbose_name_plural": "revoked tokens",
+            },
+        ),
+    ]
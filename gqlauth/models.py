@@ -1,4 +1,5 @@
 import binascii
+import hashlib
 import os
 import time
 from datetime import datetime
@@ -6,10 +7,10 @@ from datetime import datetime
 from django.conf import settings as django_settings
 from django.contrib.auth import get_user_model
 from django.contrib.sites.shortcuts import get_current_site
+from django.core.cache import caches
 from django.core.mail import send_mail
 from django.db import models
-from django.db.models import Case, When
-from django.db.models import Value as Val
+from django.db.models import F
 from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.html import strip_tags
@@ -18,7 +19,11 @@ from strawberry.types import Info
 
 from gqlauth.core.constants import TokenAction
 from gqlauth.core.exceptions import UserAlreadyVerified
-from gqlauth.core.utils import get_payload_from_token, get_token
+from gqlauth.core.utils import (
+    get_payload_from_token,
+    get_token,
+    revoke_user_refresh_token,
+)
 
 # gqlauth imports
 from gqlauth.settings import gqlauth_settings as app_settings
@@ -38,6 +43,8 @@ class UserStatus(models.Model):
     )
     verified = models.BooleanField(default=False)
     archived = models.BooleanField(default=False)
+    # tokens (and refresh tokens) created with an older generation are rejected.
+    token_generation = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return "%s - status" % (self.user)
@@ -142,6 +149,28 @@ class UserStatus(models.Model):
             user_status.archived = False
             user_status.save(update_fields=["archived"])
 
+    @classmethod
+    def revoke_tokens(cls, user):
+        """Revokes every token of the user with a single row update, and
+        marks their refresh tokens revoked in the same transaction."""
+        from gqlauth.jwt.cache import set_token_generation
+        from gqlauth.user.signals import _invalidate_cached_user
+
+        storage = app_settings.JWT_REFRESH_TOKEN_STORAGE
+        with storage.atomic():
+            cls.objects.filter(user=user).update(
+                token_generation=F("token_generation") + 1
+            )
+            # a single UPDATE for the database storage.
+            revoke_user_refresh_token(user)
+        # tokens created from now on need the new generation.
+        user.status.refresh_from_db(fields=["token_generation"])
+        set_token_generation(
+            getattr(user, app_settings.JWT_PAYLOAD_PK.python_name),
+            user.status.token_generation,
+        )
+        _invalidate_cached_user(user)
+
     @classmethod
     def archive(cls, user):
         user_status = cls.objects.get(user=user)
@@ -151,15 +180,36 @@ class UserStatus(models.Model):
 
 
 class RefreshTokenQuerySet(models.QuerySet):
+    def active(self):
+        """Tokens that are neither revoked nor expired."""
+        return self.filter(revoked__isnull=True, expires_at__gt=timezone.now())
+
     def expired(self):
-        expires = timezone.now() - app_settings.JWT_REFRESH_EXPIRATION_DELTA
-        return self.annotate(
-            expired=Case(
-                When(created__lt=expires, then=Val(True)),
-                output_field=models.BooleanField(),
-                default=Val(False),
-            ),
-        )
+        """Tokens past their expiration date, revoked or not."""
+        return self.filter(expires_at__lte=timezone.now())
+
+    def with_token_generation(self):
+        """Annotates the user's current token generation, so that
+        `RefreshToken.is_expired_` needs no query of its own."""
+        return self.annotate(user_token_generation=F("user__status__token_generation"))
+
+    def revoke(self) -> int:
+        """Revokes all the tokens of the queryset that are not revoked yet
+        with a single query, returns how many were revoked."""
+        return self.filter(revoked__isnull=True).update(revoked=timezone.now())
+
+    def by_token(self, token: str):
+        return self.filter(token_hash=RefreshToken.hash_token(token))
+
+    def get_by_token(self, token: str, **kwargs) -> "RefreshToken":
+        """Raises `RefreshToken.DoesNotExist` if there is no such token."""
+        obj = self.by_token(token).get(**kwargs)
+        obj.token = token
+        return obj
+
+
+def _refresh_token_expiry() -> datetime:
+    return timezone.now() + app_settings.JWT_REFRESH_EXPIRATION_DELTA
 
 
 class RefreshToken(models.Model):
@@ -168,6 +218,9 @@ class RefreshToken(models.Model):
 
     It can be used to retrieve a new token without the need to login
     again.
+
+    Only a digest of the token is stored, the raw token is available as
+    `token` on instances created by `from_user` (or looked up by it).
     """
 
     id = models.BigAutoField(primary_key=True)  # noqa A003
@@ -177,43 +230,123 @@ class RefreshToken(models.Model):
         related_name="refresh_tokens",
         verbose_name=_("user"),
     )
-    token = models.CharField(_("token"), max_length=255, editable=False)
+    token_hash = models.CharField(
+        _("token hash"), max_length=64, unique=True, editable=False
+    )
     created = models.DateTimeField(_("created"), auto_now_add=True)
+    expires_at = models.DateTimeField(_("expires at"), default=_refresh_token_expiry)
     revoked = models.DateTimeField(_("revoked"), null=True, blank=True)
+    generation = models.PositiveIntegerField(_("generation"), default=0)
 
     def expires_at_(self) -> datetime:
-        return self.created + app_settings.JWT_REFRESH_EXPIRATION_DELTA
+        return self.expires_at
 
-    def is_expired_(self) -> bool:
+    def is_expired_(self, token_generation: int | None = None) -> bool:
         """Whether the token is expired or not.
 
         it is up to the database query to filter out tokens without
-        revoked date.
+        revoked date. The user's current `token_generation` is read from
+        `RefreshTokenQuerySet.with_token_generation`, or the loaded user
+        status, unless given.
         """
-        return datetime.now(tz=self.created.tzinfo) > self.expires_at_() or bool(
-            self.revoked
+        if timezone.now() > self.expires_at or self.revoked:
+            return True
+        if token_generation is None:
+            token_generation = self._user_token_generation()
+        return self.generation < token_generation
+
+    def _user_token_generation(self) -> int:
+        if self.user_token_generation is not None:
+            return self.user_token_generation
+        if RefreshToken.user.is_cached(self) and USER_MODEL.status.is_cached(self.user):
+            return self.user.status.token_generation
+        return (
+            UserStatus.objects.filter(user_id=self.user_id)
+            .values_list("token_generation", flat=True)
+            .get()
         )
 
-    def revoke(self):
-        self.revoked = timezone.now()
-        self.save(update_fields=["revoked"])
+    def revoke(self) -> bool:
+        return app_settings.JWT_REFRESH_TOKEN_STORAGE.revoke(self)
 
     objects = RefreshTokenQuerySet.as_manager()  # type: ignore
 
+    # the raw token, never persisted.
+    token: str | None = None
+    # annotated by `RefreshTokenQuerySet.with_token_generation`.
+    user_token_generation: int | None = None
+
     class Meta:
         verbose_name = _("refresh token")
         verbose_name_plural = _("refresh tokens")
-        unique_together = ("token", "revoked")
+        indexes = [
+            # lookups of a user's live tokens, partial where the database allows.
+            models.Index(
+                fields=["user", "expires_at"],
+                condition=models.Q(revoked__isnull=True),
+                name="gqlauth_refresh_token_active",
+            ),
+        ]
 
     def __str__(self):
-        return self.token
+        return self.token_hash
 
-    @classmethod
-    def from_user(cls, user) -> "RefreshToken":
-        token = binascii.hexlify(
+    @staticmethod
+    def hash_token(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @staticmethod
+    def generate_token() -> str:
+        return binascii.hexlify(
             os.urandom(app_settings.JWT_REFRESH_TOKEN_N_BYTES),
         ).decode()
 
-        obj = RefreshToken.objects.create(user=user, token=token)
-        obj.save()
-        return obj
+    def rotate(self) -> "RefreshToken | None":
+        """Revokes this token and creates its successor.
+
+        Call it inside `JWT_REFRESH_TOKEN_STORAGE.atomic()` on a token
+        fetched with `for_update=True`. Within
+        `JWT_REFRESH_TOKEN_ROTATION_GRACE` of a rotation a new token is
+        returned again, as long as the successor is still valid. Returns
+        `None` if the token can't be rotated.
+        """
+        storage = app_settings.JWT_REFRESH_TOKEN_STORAGE
+        grace = app_settings.JWT_REFRESH_TOKEN_ROTATION_GRACE
+        cache = caches[app_settings.CACHE_ALIAS]
+        successor_key = f"gqlauth:refresh_token:successor:{self.token_hash}"
+        if not self.is_expired_() and storage.revoke(self):
+            successor = storage.create(self.user)
+            if grace:
+                # only the digest, the raw successor is never stored.
+                cache.set(successor_key, successor.token_hash, grace.total_seconds())
+            return successor
+        if grace and self.revoked and timezone.now() - self.revoked <= grace:
+            if (successor_hash := cache.get(successor_key)) and (
+                successor := storage.get_by_hash(successor_hash)
+            ):
+                if not successor.is_expired_():
+                    # the first caller holds the successor, this one gets a
+                    # sibling of it.
+                    return storage.create(self.user)
+        return None
+
+    @classmethod
+    def from_user(cls, user) -> "RefreshToken":
+        return app_settings.JWT_REFRESH_TOKEN_STORAGE.create(user)
+
+
+class RevokedToken(models.Model):
+    """The `jti` of an access token that was revoked before its expiration,
+    see `JWT_DENYLIST`."""
+
+    id = models.BigAutoField(primary_key=True)  # noqa A003
+    jti = models.CharField(_("jti"), max_length=64, unique=True)
+    expires_at = models.DateTimeField(_("expires at"), db_index=True)
+    created = models.DateTimeField(_("created"), auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = _("revoked token")
+        verbose_name_plural = _("revoked tokens")
+
+    def __str__(self):
+        return self.jti
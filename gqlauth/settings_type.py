@@ -1,4 +1,5 @@
 import json
+import uuid
 from collections.abc import Callable
 from dataclasses import dataclass, field
 from datetime import timedelta
@@ -18,10 +19,15 @@ from strawberry import ID
 from strawberry.annotation import StrawberryAnnotation
 from strawberry.types.field import StrawberryField
 
+from gqlauth.captcha.storage import CaptchaStorage, DatabaseCaptchaStorage
+from gqlauth.jwt.keys import KeyRing, decode_jwt_claims, encode_jwt
+from gqlauth.jwt.storage import DatabaseRefreshTokenStorage, RefreshTokenStorage
+
 if TYPE_CHECKING:  # pragma: no cover
     from django.contrib.auth.base_user import AbstractBaseUser
 
     from gqlauth.core.utils import UserProto
+    from gqlauth.jwt.cache import UserCache
     from gqlauth.jwt.types_ import TokenType
 
 
@@ -50,36 +56,46 @@ def create_token_type(user: "AbstractBaseUser") -> "TokenType":
 
     user_pk = app_settings.JWT_PAYLOAD_PK.python_name
     pk_field = {user_pk: getattr(user, user_pk)}
+    generation = user.status.token_generation  # type: ignore
+    if app_settings.JWT_STATELESS_AUTHENTICATION:
+        from gqlauth.jwt.cache import set_token_generation
+        from gqlauth.jwt.claims import get_user_claims
+
+        pk_field["claims"] = get_user_claims(user)  # type: ignore
+        # so that verifying the token won't have to query it.
+        set_token_generation(pk_field[user_pk], generation, replace=False)
     payload = TokenPayloadType(
         **pk_field,
+        generation=generation,
+        jti=uuid.uuid4().hex,
     )
-    serialized = json.dumps(payload.as_dict(), sort_keys=True, indent=1)
+    if app_settings.JWT_COMPACT_PAYLOAD:
+        jwt_payload = payload.as_claims()
+    else:
+        serialized = json.dumps(payload.as_dict(), sort_keys=True, indent=1)
+        jwt_payload = {"payload": serialized}
     return TokenType(
-        token=str(
-            jwt.encode(
-                payload={"payload": serialized},
-                key=cast(str, app_settings.JWT_SECRET_KEY.value),
-                algorithm=app_settings.JWT_ALGORITHM,
-            )
-        ),
+        token=encode_jwt(jwt_payload),
         payload=payload,
     )
 
 
 def decode_jwt(token: str) -> "TokenType":
-    from gqlauth.core.utils import app_settings
+    """Decodes both the compact and the legacy (nested json string) payload
+    formats."""
+    from gqlauth.core.exceptions import TokenExpired
     from gqlauth.jwt.types_ import TokenPayloadType, TokenType
 
-    decoded = json.loads(
-        jwt.decode(
-            token,
-            key=cast(str, app_settings.JWT_SECRET_KEY.value),
-            algorithms=[
-                app_settings.JWT_ALGORITHM,
-            ],
-        )["payload"]
-    )
-    return TokenType(token=token, payload=TokenPayloadType.from_dict(decoded))
+    try:
+        decoded = decode_jwt_claims(token)
+    except jwt.ExpiredSignatureError:
+        raise TokenExpired from None
+    if "payload" in decoded:  # legacy format
+        return TokenType(
+            token=token,
+            payload=TokenPayloadType.from_dict(json.loads(decoded["payload"])),
+        )
+    return TokenType(token=token, payload=TokenPayloadType.from_claims(decoded))
 
 
 def default_text_factory():
@@ -196,6 +212,16 @@ class GqlAuthSettings:
     CAPTCHA_SAVE_IMAGE: bool = False
     """If True, an png representation of the captcha will be saved under
     MEDIA_ROOT/captcha/<datetime>/<uuid>.png."""
+    CAPTCHA_POOL_SIZE: int = 0
+    """How many captchas to render ahead of time in a background thread of
+    each process, 0 renders them within the request."""
+    CAPTCHA_STORAGE: CaptchaStorage = field(default_factory=DatabaseCaptchaStorage)
+    """A `gqlauth.captcha.storage.CaptchaStorage` instance that keeps the
+    captchas until they are answered.
+
+    Defaults to the database, use `DjangoCacheCaptchaStorage(alias=...)` to
+    keep them in a django cache, where they expire on their own.
+    """
     # optional fields on update account, can be list of fields
     UPDATE_MUTATION_FIELDS: set[StrawberryField] = field(
         default_factory=lambda: {first_name_field, last_name_field}
@@ -236,6 +262,23 @@ class GqlAuthSettings:
 
     JWT_ALGORITHM: str = "HS256"
     """Algorithm used for signing the token."""
+    JWT_KEY_RING: KeyRing | None = None
+    """A `gqlauth.jwt.keys.KeyRing` of (possibly asymmetric, i.e `RS256`,
+    `ES256`, `EdDSA`) keys selected by the `kid` header. When set it takes
+    over `JWT_SECRET_KEY` and `JWT_ALGORITHM`, tokens without `kid` are
+    rejected (see `JWT_KEY_RING_ALLOW_SECRET_KEY`).
+
+    Asymmetric algorithms require `cryptography` (`pip install pyjwt[crypto]`).
+    """
+    JWT_KEY_RING_ALLOW_SECRET_KEY: bool = False
+    """Keep verifying tokens without `kid` with `JWT_SECRET_KEY` while
+    `JWT_KEY_RING` is set.
+
+    Meant for migrating to a key ring without logging everyone out, turn it
+    off once the old tokens have expired, otherwise the old secret stays valid.
+    """
+    JWKS_MAX_AGE: timedelta = timedelta(hours=1)
+    """`Cache-Control: max-age` of the `gqlauth.jwt.views.jwks` endpoint."""
     JWT_TIME_FORMAT: str = "%Y-%m-%d-%H-%M-%S-%z"
     """A valid 'strftime' string that will be used to encode the token
     payload."""
@@ -252,6 +295,59 @@ class GqlAuthSettings:
     *This filed must be unique in the database*
     """
     JWT_DECODE_HANDLER: Callable[[str], "TokenType"] = decode_jwt
+    JWT_COMPACT_PAYLOAD: bool = False
+    """Whether to encode new tokens with flat `sub`, `iat` and `exp` (unix
+    time) claims instead of a JSON string nested under `payload`. Tokens are
+    smaller, expiration is validated by PyJWT and no date strings are parsed.
+
+    Tokens of both formats are accepted regardless of this setting.
+    """
+    JWT_TOKEN_CACHE_SIZE: int = 0
+    """Max number of verified tokens kept in a process-local LRU cache keyed by
+    the token string. A cached token is served without verifying the signature
+    or parsing the payload again, until its `exp` has passed.
+
+    `0` disables the cache.
+    """
+    JWT_VERIFY_TOKENS_MAX_BATCH: int = 100
+    """Max number of tokens the `verifyTokens` mutation accepts in one call,
+    larger batches are rejected without verifying any token."""
+    JWT_STATELESS_AUTHENTICATION: bool = False
+    """Whether to sign `is_active`, `verified`, `archived` and
+    `JWT_STATELESS_CLAIMS` into the token. The middlewares would then
+    authenticate requests with a `gqlauth.jwt.claims.ClaimsUser` built from
+    these claims, without querying the database.
+
+    Keep in mind that the claims are only as fresh as the token.
+    """
+    JWT_STATELESS_CLAIMS: set[str] = field(default_factory=set)
+    """Additional user attributes signed into the token when
+    `JWT_STATELESS_AUTHENTICATION` is on, values must be JSON serializable."""
+    JWT_DENYLIST: bool = False
+    """Whether to reject access tokens revoked before they expire, with the
+    `token` argument of `revokeToken` or `TokenType.revoke()`. They are
+    rejected with a "Revoked token." error.
+
+    Each process keeps the revoked token ids in a Bloom filter synced
+    with the database, so checking a token that was not revoked costs no
+    round trip.
+    """
+    JWT_DENYLIST_REFRESH_INTERVAL: timedelta = timedelta(seconds=5)
+    """How often each process fetches the tokens revoked since its last sync,
+    in a background thread, i.e. how long a token revoked on another process
+    might still be accepted."""
+    JWT_USER_CACHE: Optional["UserCache"] = None
+    """A `gqlauth.jwt.cache.UserCache` instance used to cache the users (and
+    their status) loaded for authenticated requests, keyed by `JWT_PAYLOAD_PK`.
+    Entries are deleted when the user or its status is saved or deleted,
+    with `LocMemUserCache` that only reaches the current process. Other
+    processes only notice token revocations, through the token generation
+    kept in the `CACHE_ALIAS` cache, and see any other change once the entry
+    expires.
+
+    Use `LocMemUserCache()` for a process-local cache or
+    `DjangoCacheUserCache(alias=...)` to use one of your django `CACHES`.
+    """
 
     JWT_TOKEN_FINDER: Callable[[Union["HttpRequest", dict]], str | None] = token_finder
     """A hook called by `GqlAuthRootField` to find the token. Accepts the
@@ -273,6 +369,38 @@ class GqlAuthSettings:
     """Number of bytes for long running refresh token."""
     JWT_REFRESH_EXPIRATION_DELTA: timedelta = timedelta(days=7)
     """Refresh token expiration time delta."""
+    JWT_MAX_ACTIVE_REFRESH_TOKENS_PER_USER: int = 0
+    """Maximum number of active refresh tokens a user may have, the oldest
+    ones are revoked when a new one is created. `0` means no limit.
+
+    Only enforced by the database storage.
+    """
+    JWT_REFRESH_TOKEN_STORAGE: RefreshTokenStorage = field(
+        default_factory=DatabaseRefreshTokenStorage
+    )
+    """A `gqlauth.jwt.storage.RefreshTokenStorage` instance that keeps the
+    refresh tokens.
+
+    Defaults to the database, use `DjangoCacheRefreshTokenStorage(alias=...)`
+    to keep them in one of your django `CACHES` instead (the purge command
+    and the `RefreshToken` querysets only apply to the database).
+    """
+    JWT_REFRESH_TOKEN_ROTATION_GRACE: timedelta = timedelta(0)
+    """For how long after a refresh token was rotated (`revokeRefreshToken:
+    true`) presenting it again returns a new refresh token instead of
+    failing, as long as the token it was rotated into is still valid.
+    Useful when several tabs or retries refresh at the same time.
+
+    The digest of the successor is kept in the `CACHE_ALIAS` cache for that
+    long, so use a shared cache if you run more than one process.
+    """
+    CACHE_ALIAS: str = "default"
+    """The django cache (from `CACHES`) used by gqlauth.
+
+    Revoking all the tokens of a user only reaches the processes sharing
+    this cache, when `JWT_USER_CACHE` or `JWT_STATELESS_AUTHENTICATION` is
+    used. Use a shared cache if you run more than one process.
+    """
 
     def __post_init__(self):
         # if there override the defaults
@@ -15,6 +15,7 @@ from gqlauth.user.resolvers import (
     UpdateAccountMixin,
     VerifyAccountMixin,
     VerifyTokenMixin,
+    VerifyTokensMixin,
 )
 
 __all__ = [
@@ -30,6 +31,7 @@ __all__ = [
     "PasswordChange",
     "UpdateAccount",
     "VerifyToken",
+    "VerifyTokens",
     "RefreshToken",
     "RevokeToken",
     "Captcha",
@@ -93,6 +95,10 @@ class VerifyToken(VerifyTokenMixin, ArgMixin):
     __doc__ = VerifyTokenMixin.__doc__
 
 
+class VerifyTokens(VerifyTokensMixin, ArgMixin):
+    __doc__ = VerifyTokensMixin.__doc__
+
+
 class RefreshToken(RefreshTokenMixin, ArgMixin):
     __doc__ = RefreshTokenMixin.__doc__
 
@@ -1,11 +1,10 @@
-import contextlib
 from typing import TYPE_CHECKING, Union
 
 from django.contrib.auth import get_user_model
 
 from gqlauth.core.constants import Messages
 from gqlauth.core.types_ import MutationNormalOutput
-from gqlauth.core.utils import USER_UNION
+from gqlauth.core.utils import USER_UNION, app_settings
 
 if TYPE_CHECKING:  # pragma: no cover
     from gqlauth.user.resolvers import ObtainJSONWebTokenInput, RegisterMixin
@@ -26,16 +25,9 @@ def confirm_password(user: USER_UNION, input_) -> MutationNormalOutput | None:
     return MutationNormalOutput(success=False, errors=errors)
 
 
-with contextlib.suppress(ImportError):
-    from gqlauth.captcha.models import Captcha as CaptchaModel
-
-
 def check_captcha(
     input_: Union["RegisterMixin.RegisterInput", "ObtainJSONWebTokenInput"],
 ):
-    uuid = input_.identifier
-    try:
-        obj = CaptchaModel.objects.get(uuid=uuid)
-    except CaptchaModel.DoesNotExist:
-        return Messages.CAPTCHA_EXPIRED
-    return obj.validate(input_.userEntry)
+    return app_settings.CAPTCHA_STORAGE.validate(
+        input_.identifier, input_.userEntry, getattr(input_, "challenge", None)
+    )
@@ -5,7 +5,7 @@ from strawberry.schema_directive import Location
 from strawberry.types import Info
 
 from gqlauth.core.types_ import GQLAuthError, GQLAuthErrors
-from gqlauth.core.utils import get_user
+from gqlauth.core.utils import get_db_user
 
 # project
 from .types_ import UserFilter, UserType
@@ -24,14 +24,14 @@ class UserQueries:
         description="Returns the current user if he is not anonymous."
     )
     def public_user(self, info: Info) -> UserType | None:
-        user = get_user(info)
+        user = get_db_user(info)
         if not user.is_anonymous:
             return user  # type: ignore
         return None
 
     @strawberry_django.field()
     def me(self, info: Info) -> UserType:
-        user = get_user(info)
+        user = get_db_user(info)
         if not user.is_authenticated:
             raise GQLAuthError(code=GQLAuthErrors.UNAUTHENTICATED)
         return user  # type: ignore
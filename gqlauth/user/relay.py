@@ -16,6 +16,7 @@ from gqlauth.user.resolvers import (
     UpdateAccountMixin,
     VerifyAccountMixin,
     VerifyTokenMixin,
+    VerifyTokensMixin,
 )
 
 with contextlib.suppress(ImportError):
@@ -33,6 +34,7 @@ __all__ = [
     "PasswordChange",
     "UpdateAccount",
     "VerifyToken",
+    "VerifyTokens",
     "RefreshToken",
     "RevokeToken",
     "Captcha",
@@ -93,6 +95,10 @@ class VerifyToken(VerifyTokenMixin, RelayMixin):
     __doc__ = VerifyTokenMixin.__doc__
 
 
+class VerifyTokens(VerifyTokensMixin, RelayMixin):
+    __doc__ = VerifyTokensMixin.__doc__
+
+
 class RefreshToken(RefreshTokenMixin, RelayMixin):
     __doc__ = RefreshTokenMixin.__doc__
 
@@ -2,7 +2,7 @@ import contextlib
 from collections.abc import Callable
 from dataclasses import asdict
 from smtplib import SMTPException
-from typing import cast
+from typing import Optional, cast
 from uuid import UUID
 
 import strawberry
@@ -12,12 +12,14 @@ from django.contrib.auth.forms import PasswordChangeForm, SetPasswordForm
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.signing import BadSignature, SignatureExpired
 from django.db import transaction
+from jwt import PyJWTError
 from strawberry.types import Info
 from strawberry.types.field import StrawberryField
 
 from gqlauth.core.constants import Messages, TokenAction
 from gqlauth.core.exceptions import (
     PasswordAlreadySetError,
+    TokenExpired,
     TokenScopeError,
     UserAlreadyVerified,
     UserNotVerified,
@@ -26,6 +28,7 @@ from gqlauth.core.types_ import GQLAuthError, GQLAuthErrors, MutationNormalOutpu
 from gqlauth.core.utils import (
     UserProto,
     cast_to_status_user,
+    get_db_user,
     get_payload_from_token,
     get_user,
     get_user_by_email,
@@ -39,9 +42,11 @@ from gqlauth.jwt.types_ import (
     RevokeRefreshTokenType,
     TokenType,
     VerifyTokenInput,
+    VerifyTokensInput,
+    VerifyTokensType,
     VerifyTokenType,
 )
-from gqlauth.models import RefreshToken, UserStatus
+from gqlauth.models import UserStatus
 from gqlauth.settings import gqlauth_settings as app_settings
 from gqlauth.user.forms import (
     EmailForm,
@@ -51,6 +56,7 @@ from gqlauth.user.forms import (
 )
 from gqlauth.user.helpers import check_captcha, confirm_password
 from gqlauth.user.signals import user_registered, user_verified
+from gqlauth.user.types_ import UserType
 
 UserModel = get_user_model()
 
@@ -90,7 +96,7 @@ with contextlib.suppress(ImportError):
         """Creates a brand-new captcha. Returns a base64 encoded string of the
         captcha. And uuid representing the captcha id in the database. When you
         will try to log in or register You will need submit that uuid With the
-        user input.
+        user input, and the challenge if there is one.
 
         **The captcha will be invoked when the timeout expires**.
         """
@@ -127,6 +133,7 @@ class RegisterMixin(BaseMixin):
         if app_settings.REGISTER_REQUIRE_CAPTCHA:
             identifier: UUID
             userEntry: str
+            challenge: str | None = None
 
     form = (
         PasswordLessRegisterForm
@@ -304,7 +311,7 @@ class PasswordResetMixin(BaseMixin):
             status: "UserStatus" = getattr(user, "status")  # noqa: B009
             f = cls.form(user, asdict(input_))  # type: ignore
             if f.is_valid():
-                revoke_user_refresh_token(user)
+                UserStatus.revoke_tokens(user)
                 user = f.save()  # type: ignore
                 if status.verified is False:
                     status.verified = True
@@ -355,7 +362,7 @@ class PasswordSetMixin(BaseMixin):
                 # Check if user has already set a password
                 if user.has_usable_password():
                     raise PasswordAlreadySetError
-                revoke_user_refresh_token(user)
+                UserStatus.revoke_tokens(user)
                 user = f.save()  # type: ignore
                 status: "UserStatus" = getattr(user, "status")  # noqa: B009
 
@@ -413,7 +420,7 @@ class ArchiveOrDeleteMixin(BaseMixin):
     def resolve_mutation(
         cls, info, input_: ArchiveOrDeleteMixinInput
     ) -> MutationNormalOutput:
-        user = get_user(info)
+        user = get_db_user(info)
         if error := confirm_password(user, input_):
             return error
         cls.resolve_action(user)  # type: ignore
@@ -429,7 +436,7 @@ class ArchiveAccountMixin(ArchiveOrDeleteMixin):
     @classmethod
     def resolve_action(cls, user):
         UserStatus.archive(user)
-        revoke_user_refresh_token(user=user)
+        UserStatus.revoke_tokens(user)
 
 
 class DeleteAccountMixin(ArchiveOrDeleteMixin):
@@ -467,14 +474,14 @@ class PasswordChangeMixin(BaseMixin):
     def resolve_mutation(
         cls, info: Info, input_: PasswordChangeInput
     ) -> ObtainJSONWebTokenType:
-        user = get_user(info)
+        user = get_db_user(info)
         if error := confirm_password(user, input_):
             return ObtainJSONWebTokenType(**asdict(error))  # type: ignore
 
         args = asdict(input_)  # type: ignore
         f = cls.form(user, args)  # type: ignore
         if f.is_valid():
-            revoke_user_refresh_token(user)
+            UserStatus.revoke_tokens(user)
             user = f.save()
             user_with_status = cast_to_status_user(user)
             return ObtainJSONWebTokenType.from_user(user_with_status)
@@ -499,7 +506,7 @@ class UpdateAccountMixin(BaseMixin):
 
     @classmethod
     def resolve_mutation(cls, info, input_: UpdateAccountInput) -> MutationNormalOutput:
-        user = get_user(info)
+        user = get_db_user(info)
         f = cls.form(
             asdict(input_),  # type: ignore
             instance=user,
@@ -522,6 +529,20 @@ class VerifyTokenMixin(BaseMixin):
         return VerifyTokenType.from_token(input_)
 
 
+class VerifyTokensMixin(BaseMixin):
+    """### Checks a batch of tokens at once.
+
+    Returns a result per token, in the same order. All the users are
+    fetched with a single query.
+
+    *Note that this is not for refresh tokens.*
+    """
+
+    @classmethod
+    def resolve_mutation(cls, _: Info, input_: VerifyTokensInput) -> VerifyTokensType:
+        return VerifyTokensType.from_tokens(input_)
+
+
 class RefreshTokenMixin(BaseMixin):
     """### refreshToken to generate a new login token:
 
@@ -548,46 +569,70 @@ class RefreshTokenMixin(BaseMixin):
     def resolve_mutation(
         cls, info, input_: RefreshTokenInput
     ) -> ObtainJSONWebTokenType:
-        try:
-            res = RefreshToken.objects.get(token=input_.refresh_token)
-        except RefreshToken.DoesNotExist:
-            return ObtainJSONWebTokenType(success=False, errors=Messages.INVALID_TOKEN)
-        user = res.user
-        if res.is_expired_():
+        storage = app_settings.JWT_REFRESH_TOKEN_STORAGE
+        rotate = input_.revoke_refresh_token
+        with storage.atomic() if rotate else contextlib.nullcontext():
+            if (res := storage.get(input_.refresh_token, for_update=rotate)) is None:
+                return ObtainJSONWebTokenType(
+                    success=False, errors=Messages.INVALID_TOKEN
+                )
+            refresh_token = res.rotate() if rotate else res
+        if refresh_token is None or refresh_token.is_expired_():
             return ObtainJSONWebTokenType(success=False, errors=Messages.EXPIRED_TOKEN)
+        user = res.user
         # fields that are determined by if statements are not recognized by mypy.
-        ret = ObtainJSONWebTokenType(
+        return ObtainJSONWebTokenType(
             success=True,
+            user=cast(UserType, user),
             token=TokenType.from_user(cast(UserProto, user)),
-            refresh_token=res,  # type: ignore
+            refresh_token=refresh_token,  # type: ignore
         )
-        if input_.revoke_refresh_token:
-            res.revoke()
-            ret.refresh_token = cast(RefreshTokenType, RefreshToken.from_user(user))
-        return ret
 
 
 class RevokeTokenMixin(BaseMixin):
     """### Suspends a refresh token.
 
     *token must exist to be revoked.*
+
+    An access token of the same user can be revoked along with it, it is
+    rejected from then on if `JWT_DENYLIST` is on.
     """
 
     @strawberry.input
     class RevokeTokenInput:
         refresh_token: str
+        token: Optional[str] = strawberry.field(
+            description="an access token of the same user to revoke as well.",
+            default=None,
+        )
 
     @classmethod
     def resolve_mutation(
         cls, _: Info, input_: RevokeTokenInput
     ) -> RevokeRefreshTokenType:
-        try:
-            refresh_token = RefreshToken.objects.get(
-                token=input_.refresh_token, revoked__isnull=True
-            )
-            refresh_token.revoke()
-            return RevokeRefreshTokenType(
-                success=True, refresh_token=cast(RefreshTokenType, refresh_token)
-            )
-        except RefreshToken.DoesNotExist:
+        refresh_token = app_settings.JWT_REFRESH_TOKEN_STORAGE.get(input_.refresh_token)
+        if refresh_token is None:
             return RevokeRefreshTokenType(success=False, errors=Messages.INVALID_TOKEN)
+        if input_.token is not None:
+            try:
+                token = TokenType.from_token(input_.token)
+            except PyJWTError:
+                return RevokeRefreshTokenType(
+                    success=False, errors=Messages.INVALID_TOKEN
+                )
+            except TokenExpired:
+                token = None  # not accepted anymore anyway.
+            if token is not None:
+                pk_name = app_settings.JWT_PAYLOAD_PK.python_name
+                if getattr(token.payload, pk_name) != getattr(
+                    refresh_token.user, pk_name
+                ):
+                    return RevokeRefreshTokenType(
+                        success=False, errors=Messages.INVALID_TOKEN
+                    )
+                token.revoke()
+        if not refresh_token.revoke():
+            return RevokeRefreshTokenType(success=False, errors=Messages.INVALID_TOKEN)
+        return RevokeRefreshTokenType(
+            success=True, refresh_token=cast(RefreshTokenType, refresh_token)
+        )
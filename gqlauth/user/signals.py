@@ -1,5 +1,8 @@
+import contextlib
+
 from django.conf import settings as django_settings
-from django.db.models.signals import post_save
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import Signal, receiver
 
 
@@ -11,5 +14,24 @@ def create_user_status(sender, instance, created, **kwargs):
         UserStatus._default_manager.get_or_create(user=instance)
 
 
+def _invalidate_cached_user(user) -> None:
+    from gqlauth.settings import gqlauth_settings as app_settings
+
+    if (cache := app_settings.JWT_USER_CACHE) is not None:
+        cache.delete(getattr(user, app_settings.JWT_PAYLOAD_PK.python_name))
+
+
+@receiver((post_save, post_delete), sender=django_settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    _invalidate_cached_user(instance)
+
+
+@receiver((post_save, post_delete), sender="gqlauth.UserStatus")
+def invalidate_cached_user_status(sender, instance, **kwargs):
+    # the user might be deleted already (cascade), it is invalidated by itself then.
+    with contextlib.suppress(ObjectDoesNotExist):
+        _invalidate_cached_user(instance.user)
+
+
 user_registered = Signal()
 user_verified = Signal()
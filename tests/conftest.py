@@ -229,8 +229,10 @@ def override_gqlauth(app_settings):
         else:
             default = getattr(app_settings, name)
         setattr(app_settings, name, replace)
-        yield
-        setattr(app_settings, name, default)
+        try:
+            yield
+        finally:
+            setattr(app_settings, name, default)
 
     return inner
 
@@ -1,3 +1,6 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from gqlauth.core.types_ import GQLAuthErrors
 from gqlauth.models import RefreshToken
 from tests.conftest import UserStatusType
@@ -47,13 +50,22 @@ def test_revoke_refresh_tokens_on_archive_account(verified_schema):
     """When archive account, all refresh tokens should be revoked."""
     user = verified_schema.us_type.user.obj
     user.refresh_from_db()
-    RefreshToken.from_user(user)
+    for _ in range(3):
+        RefreshToken.from_user(user)
     refresh_tokens = user.refresh_tokens.all()
     assert refresh_tokens
     for token in refresh_tokens:
         assert not token.revoked
 
-    res = verified_schema.execute(make_query(verified_schema.us_type))
+    with CaptureQueriesContext(connection) as ctx:
+        res = verified_schema.execute(make_query(verified_schema.us_type))
+    # revoked in bulk, not row by row.
+    updates = [
+        q["sql"]
+        for q in ctx.captured_queries
+        if q["sql"].startswith('UPDATE "gqlauth_refreshtoken"')
+    ]
+    assert len(updates) == 1
 
     assert res.data["archiveAccount"] == {"errors": None, "success": True}
     user.refresh_from_db()
@@ -61,4 +73,5 @@ def test_revoke_refresh_tokens_on_archive_account(verified_schema):
     refresh_tokens = user.refresh_tokens.all()
     assert refresh_tokens
     for token in refresh_tokens:
-        assert token.revoked
+        assert token.is_expired_()
+    assert not user.refresh_tokens.active().exists()
@@ -1,3 +1,4 @@
+import time
 from pathlib import Path
 from unittest.mock import MagicMock
 from uuid import uuid4
@@ -6,6 +7,9 @@ import pytest
 from django.contrib.auth import get_user_model
 from PIL import Image
 
+from gqlauth.captcha import pool as captcha_pool
+from gqlauth.captcha.captcha_factorty import FONTS_PATH, CaptchaInstanceType
+from gqlauth.captcha.create import glyph_atlas, load_font
 from gqlauth.captcha.models import Captcha
 from gqlauth.core.constants import Messages
 from gqlauth.settings import gqlauth_settings
@@ -36,6 +40,68 @@ def test_bytes(captcha):
     captcha.as_bytes()
 
 
+def test_glyphs_are_rasterised_once():
+    font = FONTS_PATH + "/OpenSans-Semibold.ttf"
+    glyph = glyph_atlas.get(font, 42, "a")
+    assert glyph_atlas.get(font, 42, "a") is glyph
+    assert glyph.mask.mode == "L"
+    assert glyph.mask.getbbox()
+    assert load_font(font, 42) is load_font(font, 42)
+
+
+def fake_captcha() -> CaptchaInstanceType:
+    return CaptchaInstanceType(png=b"png", text="pooled")
+
+
+def test_captcha_pool_renders_ahead():
+    pool = captcha_pool.CaptchaPool(size=3, factory=fake_captcha)
+    pool.start()
+    for _ in range(100):
+        if pool.qsize() == 3:
+            break
+        time.sleep(0.01)
+    assert pool.qsize() == 3
+    assert pool.get().text == "pooled"
+
+
+def test_captcha_pool_renders_inline_when_empty():
+    factory = MagicMock(side_effect=fake_captcha)
+    pool = captcha_pool.CaptchaPool(size=1, factory=factory)
+    pool.start = MagicMock()  # no worker, the pool stays empty.
+    assert pool.get().text == "pooled"
+    factory.assert_called_once()
+
+
+def test_resizing_captcha_pool_stops_old_worker(override_gqlauth, monkeypatch):
+    old = captcha_pool.CaptchaPool(size=1, factory=fake_captcha)
+    monkeypatch.setattr(captcha_pool, "_pool", old)
+    old.start()
+    worker = old._worker
+    for _ in range(100):
+        if old.qsize() == 1:
+            break
+        time.sleep(0.01)
+    # the worker is now blocked on a full pool.
+    with override_gqlauth(name="CAPTCHA_POOL_SIZE", replace=2):
+        new = captcha_pool.get_captcha_pool()
+    assert new is not old
+    worker.join(timeout=2)
+    assert not worker.is_alive()
+    new.stop()
+
+
+def test_create_captcha_pops_from_pool(db, override_gqlauth, monkeypatch):
+    pool = captcha_pool.CaptchaPool(size=1, factory=fake_captcha)
+    monkeypatch.setattr(captcha_pool, "_pool", pool)
+    with (
+        override_gqlauth(name="CAPTCHA_POOL_SIZE", replace=1),
+        override_gqlauth(name="CAPTCHA_SAVE_IMAGE", replace=False),
+    ):
+        captcha = Captcha.create_captcha()
+    assert Captcha.objects.get(pk=captcha.uuid).text == "pooled"
+    assert captcha.as_bytes() == b"png"
+
+
 def test_register_user_require_captcha_validation(unverified_schema):
     res = unverified_schema.execute(
         query=register_query_without_cap_fields(username="fdsafsdfgv"), relay=True
@@ -100,6 +166,46 @@ def test_max_tries_deletes_captcha(captcha):
         Captcha.objects.get(pk=captcha.uuid)
 
 
+def test_tries_are_counted_across_requests(captcha):
+    for _ in range(gqlauth_settings.CAPTCHA_MAX_RETRIES + 1):
+        obj = Captcha.objects.get(pk=captcha.uuid)
+        assert obj.validate("wrong") == Messages.CAPTCHA_INVALID
+    obj = Captcha.objects.get(pk=captcha.uuid)
+    assert obj.tries == gqlauth_settings.CAPTCHA_MAX_RETRIES + 1
+    assert obj.validate(captcha.text) == Messages.CAPTCHA_MAX_RETRIES
+    assert not Captcha.objects.filter(pk=captcha.uuid).exists()
+
+
+def test_validate_compares_in_the_delete(captcha, django_assert_num_queries):
+    # the DELETE matches nothing, then the try is counted.
+    with django_assert_num_queries(2):
+        assert captcha.validate("wrong") == Messages.CAPTCHA_INVALID
+    with django_assert_num_queries(1):
+        assert captcha.validate(captcha.text) == Messages.CAPTCHA_VALID
+    assert captcha.validate(captcha.text) == Messages.CAPTCHA_EXPIRED
+
+
+def test_validate_with_custom_text_validator(
+    captcha, override_gqlauth, django_assert_num_queries
+):
+    with override_gqlauth(
+        name="CAPTCHA_TEXT_VALIDATOR", replace=lambda text, entry: text == entry.lower()
+    ):
+        # the text is read first, then the try is counted.
+        with django_assert_num_queries(2):
+            assert captcha.validate("wrong") == Messages.CAPTCHA_INVALID
+        assert captcha.validate(captcha.text.upper()) == Messages.CAPTCHA_VALID
+    assert not Captcha.objects.filter(pk=captcha.uuid).exists()
+
+
+def test_expired_captcha_is_deleted(captcha):
+    Captcha.objects.filter(pk=captcha.uuid).update(
+        insert_time=captcha.insert_time - gqlauth_settings.CAPTCHA_EXPIRATION_DELTA
+    )
+    assert captcha.validate(captcha.text) == Messages.CAPTCHA_EXPIRED
+    assert not Captcha.objects.filter(pk=captcha.uuid).exists()
+
+
 def login_query_without_cap_fields(password="fake", username="username"):
     return """
         mutation {{
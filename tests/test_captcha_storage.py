@@ -0,0 +1,181 @@
+from datetime import timedelta
+
+import pytest
+from django.core import signing
+
+from gqlauth.captcha.models import Captcha
+from gqlauth.captcha.storage import (
+    CaptchaStorage,
+    DjangoCacheCaptchaStorage,
+    SignedCaptchaStorage,
+)
+from gqlauth.core.constants import Messages
+from gqlauth.settings import gqlauth_settings
+
+
+@pytest.fixture()
+def cache_storage(override_gqlauth):
+    storage = DjangoCacheCaptchaStorage()
+    with override_gqlauth(name="CAPTCHA_STORAGE", replace=storage):
+        yield storage
+    storage.cache.clear()
+
+
+@pytest.fixture()
+def signed_storage(override_gqlauth):
+    storage = SignedCaptchaStorage()
+    with override_gqlauth(name="CAPTCHA_STORAGE", replace=storage):
+        yield storage
+    storage.cache.clear()
+
+
+def test_cache_storage_keeps_captchas_off_the_db(db, cache_storage):
+    captcha = Captcha.create_captcha()
+    assert not Captcha.objects.exists()
+    assert captcha.as_bytes()
+    assert cache_storage.validate(captcha.uuid, "wrong") == Messages.CAPTCHA_INVALID
+    assert cache_storage.validate(captcha.uuid, captcha.text) == Messages.CAPTCHA_VALID
+    # answers are single-use.
+    assert (
+        cache_storage.validate(captcha.uuid, captcha.text) == Messages.CAPTCHA_EXPIRED
+    )
+
+
+def test_captcha_validate_uses_the_configured_storage(db, cache_storage):
+    captcha = Captcha.create_captcha()
+    assert captcha.validate("wrong") == Messages.CAPTCHA_INVALID
+    assert captcha.validate(captcha.text) == Messages.CAPTCHA_VALID
+
+
+def test_cache_storage_max_retries(db, cache_storage):
+    captcha = Captcha.create_captcha()
+    for _ in range(gqlauth_settings.CAPTCHA_MAX_RETRIES + 1):
+        assert cache_storage.validate(captcha.uuid, "wrong") == Messages.CAPTCHA_INVALID
+    assert (
+        cache_storage.validate(captcha.uuid, captcha.text)
+        == Messages.CAPTCHA_MAX_RETRIES
+    )
+    assert (
+        cache_storage.validate(captcha.uuid, captcha.text) == Messages.CAPTCHA_EXPIRED
+    )
+
+
+def test_cache_storage_expires(db, cache_storage, override_gqlauth):
+    with override_gqlauth(name="CAPTCHA_EXPIRATION_DELTA", replace=timedelta(0)):
+        captcha = Captcha.create_captcha()
+    assert (
+        cache_storage.validate(captcha.uuid, captcha.text) == Messages.CAPTCHA_EXPIRED
+    )
+
+
+def test_signed_storage_issues_captchas_without_writes(
+    db, signed_storage, django_assert_num_queries
+):
+    with django_assert_num_queries(0):
+        captcha = Captcha.create_captcha()
+    payload = signing.loads(captcha.challenge, salt=signed_storage.salt)
+    # the answer is handed out encrypted.
+    assert set(payload) == {"uuid", "text"}
+    assert payload["text"] != captcha._format(captcha.text)
+    assert signed_storage._unseal(captcha.uuid, payload["text"]) == captcha._format(
+        captcha.text
+    )
+    assert not signed_storage.cache.get(signed_storage._text_key(captcha.uuid))
+
+
+def test_signed_storage_validates_the_challenge(db, signed_storage):
+    captcha = Captcha.create_captcha()
+    other = Captcha.create_captcha()
+    validate = signed_storage.validate
+    assert validate(captcha.uuid, captcha.text) == Messages.CAPTCHA_EXPIRED
+    assert (
+        validate(captcha.uuid, captcha.text, captcha.challenge[:-1] + "x")
+        == Messages.CAPTCHA_EXPIRED
+    )
+    assert (
+        validate(captcha.uuid, captcha.text, other.challenge)
+        == Messages.CAPTCHA_EXPIRED
+    )
+    assert validate(captcha.uuid, "wrong", captcha.challenge) == (
+        Messages.CAPTCHA_INVALID
+    )
+    assert validate(captcha.uuid, captcha.text, captcha.challenge) == (
+        Messages.CAPTCHA_VALID
+    )
+    # replaying a consumed challenge.
+    assert validate(captcha.uuid, captcha.text, captcha.challenge) == (
+        Messages.CAPTCHA_EXPIRED
+    )
+
+
+def test_signed_storage_uses_the_text_validator(db, signed_storage, override_gqlauth):
+    captcha = Captcha.create_captcha()
+    with override_gqlauth(
+        name="CAPTCHA_TEXT_VALIDATOR", replace=lambda text, entry: entry == "anything"
+    ):
+        assert (
+            signed_storage.validate(captcha.uuid, captcha.text, captcha.challenge)
+            == Messages.CAPTCHA_INVALID
+        )
+        assert (
+            signed_storage.validate(captcha.uuid, "anything", captcha.challenge)
+            == Messages.CAPTCHA_VALID
+        )
+
+
+def test_signed_storage_max_retries(db, signed_storage):
+    captcha = Captcha.create_captcha()
+    for _ in range(gqlauth_settings.CAPTCHA_MAX_RETRIES + 1):
+        assert (
+            signed_storage.validate(captcha.uuid, "wrong", captcha.challenge)
+            == Messages.CAPTCHA_INVALID
+        )
+    assert (
+        signed_storage.validate(captcha.uuid, captcha.text, captcha.challenge)
+        == Messages.CAPTCHA_MAX_RETRIES
+    )
+
+
+def test_signed_storage_expires(db, signed_storage, override_gqlauth):
+    captcha = Captcha.create_captcha()
+    with override_gqlauth(
+        name="CAPTCHA_EXPIRATION_DELTA", replace=timedelta(seconds=-1)
+    ):
+        assert (
+            signed_storage.validate(captcha.uuid, captcha.text, captcha.challenge)
+            == Messages.CAPTCHA_EXPIRED
+        )
+
+
+@pytest.mark.skipif(
+    not gqlauth_settings.REGISTER_REQUIRE_CAPTCHA,
+    reason="This test requires captcha mutation fields to be initialized",
+)
+def test_register_with_signed_captcha(
+    db, signed_storage, anonymous_schema, override_gqlauth
+):
+    with override_gqlauth(name="CAPTCHA_TEXT_FACTORY", replace=lambda: "12345"):
+        res = anonymous_schema.execute("mutation { captcha { uuid challenge } }")
+    assert not res.errors
+    assert not Captcha.objects.exists()
+    uuid, challenge = res.data["captcha"]["uuid"], res.data["captcha"]["challenge"]
+    register = """
+      mutation {{
+        register(input: {{
+          email: "signed@email.com", username: "signed_captcha",
+          password1: "SuperSecureP@ssw0rd", password2: "SuperSecureP@ssw0rd",
+          identifier: "{}", userEntry: "12345", challenge: "{}"
+        }}) {{ success errors }}
+      }}
+    """.format(uuid, challenge)
+    res = anonymous_schema.execute(register, relay=True)
+    assert res.data["register"]["success"], res.data["register"]["errors"]
+
+
+def test_captcha_storage_requires_its_methods():
+    class SaveOnlyStorage(CaptchaStorage):
+        def save(self, captcha):
+            pass
+
+    with pytest.raises(TypeError):
+        SaveOnlyStorage()  # type: ignore[abstract]
@@ -0,0 +1,113 @@
+from uuid import uuid4
+
+import pytest
+from asgiref.sync import sync_to_async
+
+from gqlauth.core.constants import Messages
+from gqlauth.core.middlewares import aget_user_or_error, get_user_or_error
+from gqlauth.core.types_ import GQLAuthErrors
+from gqlauth.jwt.denylist import BloomFilter, TokenDenylist, get_token_denylist
+from gqlauth.jwt.types_ import (
+    TokenType,
+    VerifyTokenInput,
+    VerifyTokensInput,
+    VerifyTokensType,
+    VerifyTokenType,
+)
+
+
+@pytest.fixture()
+def denylist(override_gqlauth):
+    with override_gqlauth(name="JWT_DENYLIST", replace=True):
+        denylist = get_token_denylist()
+        denylist.reset()
+        yield denylist
+        denylist.reset()
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(capacity=1000)
+    added = [uuid4().hex for _ in range(1000)]
+    for item in added:
+        bloom.add(item)
+    assert all(item in bloom for item in added)
+    false_positives = sum(uuid4().hex in bloom for _ in range(10_000))
+    assert false_positives < 300
+    # items already in the filter are not counted again.
+    assert not bloom.add(added[0])
+    assert bloom.count <= 1000
+
+
+def test_overlapping_syncs_count_tokens_once(db_verified_user_status, denylist):
+    token = TokenType.from_user(db_verified_user_status.user.obj)
+    token.revoke()
+    denylist.sync()
+    for _ in range(3):
+        denylist._next_sync = 0.0
+        denylist.sync()
+    assert denylist._filter.count == 1
+
+
+def test_revoked_token_is_rejected(
+    rf, db_verified_user_status, denylist, django_assert_num_queries
+):
+    token = TokenType.from_user(db_verified_user_status.user.obj)
+    request = rf.post(path="/fake", HTTP_AUTHORIZATION=f"JWT {token.token}")
+    denylist.sync()
+    # not revoked, no round trip.
+    with django_assert_num_queries(0):
+        assert not denylist.is_revoked(token.payload.jti)
+    assert get_user_or_error(request).error is None
+
+    token.revoke()
+    error = get_user_or_error(request).error
+    assert error.message == GQLAuthErrors.REVOKED_TOKEN.value
+
+
+def test_other_processes_sync(
+    db_verified_user_status, denylist, django_assert_num_queries
+):
+    token = TokenType.from_user(db_verified_user_status.user.obj)
+    other_process = TokenDenylist()
+    other_process.sync()
+    assert not other_process.is_revoked(token.payload.jti)
+    token.revoke()
+    # synced at the next interval only.
+    assert not other_process.is_revoked(token.payload.jti)
+    other_process._next_sync = 0.0
+    # in the background, the check itself doesn't wait for it.
+    with django_assert_num_queries(0):
+        assert not other_process.is_revoked(token.payload.jti)
+    other_process._worker.join(timeout=5)
+    assert other_process.is_revoked(token.payload.jti)
+
+
+def test_checks_go_to_the_table_until_synced(db_verified_user_status):
+    token = TokenType.from_user(db_verified_user_status.user.obj)
+    token.revoke()
+    denylist = TokenDenylist()
+    denylist._next_sync = float("inf")  # no background sync.
+    assert denylist.is_revoked(token.payload.jti)
+
+
+async def test_aget_user_or_error_revoked(rf, db_verified_user_status, denylist):
+    token = await sync_to_async(TokenType.from_user)(db_verified_user_status.user.obj)
+    request = rf.post(path="/fake", HTTP_AUTHORIZATION=f"JWT {token.token}")
+    assert (await aget_user_or_error(request)).error is None
+    await sync_to_async(token.revoke)()
+    error = (await aget_user_or_error(request)).error
+    assert error.message == GQLAuthErrors.REVOKED_TOKEN.value
+
+
+def test_verify_rejects_revoked_tokens(db_verified_user_status, denylist):
+    token = TokenType.from_user(db_verified_user_status.user.obj)
+    assert VerifyTokenType.from_token(VerifyTokenInput(token=token.token)).success
+    token.revoke()
+    result = VerifyTokenType.from_token(VerifyTokenInput(token=token.token))
+    assert not result.success
+    assert result.errors == Messages.REVOKED_TOKEN
+    (result,) = VerifyTokensType.from_tokens(
+        VerifyTokensInput(tokens=[token.token])
+    ).results
+    assert not result.success
+    assert result.errors == Messages.REVOKED_TOKEN
@@ -1,11 +1,23 @@
+import json
 import time
 from datetime import timedelta
 
+import jwt
 import pytest
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.db.models import F
 
-from gqlauth.core.exceptions import TokenExpired
-from gqlauth.jwt.types_ import TokenType
-from gqlauth.models import RefreshToken
+from gqlauth.core.exceptions import TokenExpired, TokenRevoked
+from gqlauth.jwt.cache import (
+    DjangoCacheUserCache,
+    LocMemUserCache,
+    UserCache,
+    set_token_generation,
+)
+from gqlauth.jwt.types_ import TokenPayloadType, TokenType
+from gqlauth.models import RefreshToken, UserStatus
+from gqlauth.settings_type import id_field
 
 
 def test_expired_refresh_token(db_verified_user_status, app_settings, override_gqlauth):
@@ -19,6 +31,19 @@ def test_expired_refresh_token(db_verified_user_status, app_settings, override_g
     assert app_settings.JWT_REFRESH_EXPIRATION_DELTA
 
 
+def test_active_and_expired_refresh_tokens(db_verified_user_status):
+    active = RefreshToken.from_user(db_verified_user_status.user.obj)
+    expired = RefreshToken.from_user(db_verified_user_status.user.obj)
+    revoked = RefreshToken.from_user(db_verified_user_status.user.obj)
+    expired.expires_at = expired.created
+    expired.save(update_fields=["expires_at"])
+    revoked.revoke()
+    assert list(RefreshToken.objects.active()) == [active]
+    assert list(RefreshToken.objects.expired()) == [expired]
+    assert expired.is_expired_()
+    assert revoked.is_expired_()
+
+
 def test_token_expired(db_verified_user_status, app_settings, override_gqlauth):
     with override_gqlauth(app_settings.JWT_EXPIRATION_DELTA, timedelta(seconds=1)):
         token: TokenType = TokenType.from_user(db_verified_user_status.user.obj)
@@ -29,3 +54,193 @@ def test_token_expired(db_verified_user_status, app_settings, override_gqlauth):
         with pytest.raises(TokenExpired):
             TokenType.from_token(token.token)
     assert app_settings.JWT_EXPIRATION_DELTA
+
+
+def test_token_cache_skips_decode(db_verified_user_status, override_gqlauth):
+    from gqlauth.jwt.cache import get_token_cache
+
+    with override_gqlauth(name="JWT_TOKEN_CACHE_SIZE", replace=2):
+        cache = get_token_cache()
+        cache.clear()
+        token = TokenType.from_user(db_verified_user_status.user.obj)
+        decoded = TokenType.from_token(token.token)
+        assert (cache.hits, cache.misses) == (0, 1)
+        with override_gqlauth(name="JWT_DECODE_HANDLER", replace=None):
+            # would fail if the token was decoded again.
+            assert TokenType.from_token(token.token) is decoded
+        assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_token_cache_drops_expired_tokens(db_verified_user_status, override_gqlauth):
+    from gqlauth.jwt.cache import TokenCache
+
+    cache = TokenCache(max_size=1)
+    with override_gqlauth(name="JWT_EXPIRATION_DELTA", replace=timedelta(seconds=1)):
+        token = TokenType.from_user(db_verified_user_status.user.obj)
+    cache.set(token)
+    assert cache.get(token.token) is token
+    time.sleep(1)
+    assert cache.get(token.token) is None
+    assert not len(cache)
+
+
+@pytest.mark.parametrize("user_cache", [LocMemUserCache(), DjangoCacheUserCache()])
+def test_user_cache(
+    db_verified_user_status, override_gqlauth, django_assert_num_queries, user_cache
+):
+    user = db_verified_user_status.user.obj
+    token = TokenType.from_user(user)
+    with override_gqlauth(name="JWT_USER_CACHE", replace=user_cache):
+        with django_assert_num_queries(1):
+            token.get_user_instance()
+        with django_assert_num_queries(0):
+            cached = token.get_user_instance()
+            assert cached.pk == user.pk
+            assert cached.status.verified
+
+        user.status.verified = False
+        user.status.save(update_fields=["verified"])
+        with django_assert_num_queries(1):
+            assert not token.get_user_instance().status.verified
+
+        user.set_password("new password")
+        user.save()
+        with django_assert_num_queries(1):
+            assert token.get_user_instance().check_password("new password")
+
+
+def test_compact_payload(db_verified_user_status, override_gqlauth, app_settings):
+    user = db_verified_user_status.user.obj
+    legacy = TokenType.from_user(user)
+    with override_gqlauth(name="JWT_COMPACT_PAYLOAD", replace=True):
+        compact = TokenType.from_user(user)
+        assert len(compact.token) < len(legacy.token)
+        claims = jwt.decode(compact.token, options={"verify_signature": False})
+        assert set(claims) == {"sub", "iat", "exp", "jti"}
+        decoded = TokenType.from_token(compact.token)
+        # legacy tokens are still accepted.
+        assert TokenType.from_token(legacy.token).get_user_instance() == user
+    pk_name = app_settings.JWT_PAYLOAD_PK.python_name
+    assert getattr(decoded.payload, pk_name) == getattr(user, pk_name)
+    assert decoded.payload.exp == compact.payload.exp.replace(microsecond=0)
+    assert decoded.get_user_instance() == user
+
+
+def test_compact_payload_restores_the_pk_type(override_gqlauth, app_settings):
+    if get_user_model()._meta.get_field("id").get_internal_type() not in {
+        "AutoField",
+        "BigAutoField",
+    }:
+        pytest.skip("requires an integer id field.")
+    with override_gqlauth(name="JWT_PAYLOAD_PK", replace=id_field):
+        assert TokenPayloadType.pk_from_claim("5") == 5
+
+
+def test_compact_payload_user_cache_is_invalidated(
+    db_verified_user_status, override_gqlauth
+):
+    user = db_verified_user_status.user.obj
+    with (
+        override_gqlauth(name="JWT_COMPACT_PAYLOAD", replace=True),
+        override_gqlauth(name="JWT_USER_CACHE", replace=LocMemUserCache()),
+    ):
+        token = TokenType.from_user(user)
+        assert TokenType.from_token(token.token).get_user_instance() == user
+        UserStatus.revoke_tokens(user)
+        with pytest.raises(TokenRevoked):
+            TokenType.from_token(token.token).get_user_instance()
+
+
+def test_user_cache_notices_revocations_from_other_processes(
+    db_verified_user_status, override_gqlauth, app_settings
+):
+    user = db_verified_user_status.user.obj
+    token = TokenType.from_user(user)
+    with override_gqlauth(name="JWT_USER_CACHE", replace=LocMemUserCache()):
+        assert token.get_user_instance() == user
+        # what `UserStatus.revoke_tokens` does in another process, which
+        # can't reach this process' user cache.
+        UserStatus.objects.filter(user=user).update(
+            token_generation=F("token_generation") + 1
+        )
+        pk_value = getattr(user, app_settings.JWT_PAYLOAD_PK.python_name)
+        set_token_generation(pk_value, user.status.token_generation + 1)
+        with pytest.raises(TokenRevoked):
+            token.get_user_instance()
+
+
+async def test_async_user_cache_notices_revocations_from_other_processes(
+    db_verified_user_status, override_gqlauth, app_settings
+):
+    user = db_verified_user_status.user.obj
+    token = await sync_to_async(TokenType.from_user)(user)
+    with override_gqlauth(name="JWT_USER_CACHE", replace=LocMemUserCache()):
+        assert await token.aget_user_instance() == user
+        await UserStatus.objects.filter(user=user).aupdate(
+            token_generation=F("token_generation") + 1
+        )
+        pk_value = getattr(user, app_settings.JWT_PAYLOAD_PK.python_name)
+        set_token_generation(pk_value, user.status.token_generation + 1)
+        with pytest.raises(TokenRevoked):
+            await token.aget_user_instance()
+
+
+def test_compact_payload_expired(db_verified_user_status, override_gqlauth):
+    with override_gqlauth(name="JWT_COMPACT_PAYLOAD", replace=True):
+        with override_gqlauth(
+            name="JWT_EXPIRATION_DELTA", replace=timedelta(seconds=-1)
+        ):
+            token = TokenType.from_user(db_verified_user_status.user.obj)
+        with pytest.raises(TokenExpired):
+            TokenType.from_token(token.token)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_revoke_tokens(
+    db_verified_user_status, override_gqlauth, django_assert_num_queries, compact
+):
+    user = db_verified_user_status.user.obj
+    with override_gqlauth(name="JWT_COMPACT_PAYLOAD", replace=compact):
+        token = TokenType.from_user(user)
+        refresh = RefreshToken.from_user(user)
+        # BEGIN, both updates, COMMIT and re-reading the generation.
+        with django_assert_num_queries(5):
+            UserStatus.revoke_tokens(user)
+        with pytest.raises(TokenRevoked):
+            TokenType.from_token(token.token).get_user_instance()
+        assert RefreshToken.objects.get(pk=refresh.pk).is_expired_()
+        assert not RefreshToken.objects.filter(user=user).active().exists()
+        # tokens created afterwards are valid.
+        new_token = TokenType.from_user(user)
+        assert TokenType.from_token(new_token.token).get_user_instance() == user
+        assert not RefreshToken.from_user(user).is_expired_()
+
+
+def test_user_cache_requires_its_methods():
+    class GetOnlyUserCache(UserCache):
+        def get(self, pk_value):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnlyUserCache()  # type: ignore[abstract]
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_payload_missing_required_claims(db_verified_user_status, compact):
+    from gqlauth.jwt.keys import encode_jwt
+
+    payload = TokenType.from_user(db_verified_user_status.user.obj).payload
+    if compact:
+        claims = payload.as_claims()
+        del claims["exp"]
+    else:
+        data = payload.as_dict()
+        # tokens issued before the optional claims were added still decode.
+        for name in ("claims", "generation", "jti"):
+            del data[name]
+        token = encode_jwt({"payload": json.dumps(data)})
+        assert TokenType.from_token(token).payload.jti is None
+        del data["exp"]
+        claims = {"payload": json.dumps(data)}
+    with pytest.raises(jwt.MissingRequiredClaimError):
+        TokenType.from_token(encode_jwt(claims))
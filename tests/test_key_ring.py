@@ -0,0 +1,136 @@
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+from gqlauth.jwt.keys import JWTKey, KeyRing
+from gqlauth.jwt.types_ import TokenType
+
+
+def _pem(private_key) -> str:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+@pytest.fixture(scope="module")
+def rsa_key() -> JWTKey:
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return JWTKey(kid="rsa-1", algorithm="RS256", private_key=_pem(private))
+
+
+@pytest.fixture(scope="module")
+def ec_key() -> JWTKey:
+    private = ec.generate_private_key(ec.SECP256R1())
+    return JWTKey(kid="ec-1", algorithm="ES256", private_key=_pem(private))
+
+
+def test_sign_and_verify_with_kid(db_verified_user_status, override_gqlauth, rsa_key):
+    user = db_verified_user_status.user.obj
+    with override_gqlauth(name="JWT_KEY_RING", replace=KeyRing.from_keys([rsa_key])):
+        token = TokenType.from_user(user)
+        assert jwt.get_unverified_header(token.token)["kid"] == "rsa-1"
+        assert TokenType.from_token(token.token).get_user_instance() == user
+
+
+def test_rotation(db_verified_user_status, override_gqlauth, rsa_key, ec_key):
+    user = db_verified_user_status.user.obj
+    keys = [rsa_key]
+    key_ring = KeyRing(loader=lambda: keys)
+    with override_gqlauth(name="JWT_KEY_RING", replace=key_ring):
+        old_token = TokenType.from_user(user)
+        # the new key signs, the old one is kept for verification only.
+        public_pem = (
+            serialization.load_pem_private_key(rsa_key.private_key.encode(), None)
+            .public_key()
+            .public_bytes(
+                serialization.Encoding.PEM,
+                serialization.PublicFormat.SubjectPublicKeyInfo,
+            )
+            .decode()
+        )
+        keys = [ec_key, JWTKey(kid="rsa-1", algorithm="RS256", public_key=public_pem)]
+        key_ring.reload()
+        new_token = TokenType.from_user(user)
+        assert jwt.get_unverified_header(new_token.token)["kid"] == "ec-1"
+        assert TokenType.from_token(old_token.token).get_user_instance() == user
+        assert TokenType.from_token(new_token.token).get_user_instance() == user
+
+
+def test_unknown_kid_is_invalid(db_verified_user_status, override_gqlauth, rsa_key):
+    token = jwt.encode({"sub": "x"}, "secret", headers={"kid": "unknown"})
+    with override_gqlauth(name="JWT_KEY_RING", replace=KeyRing.from_keys([rsa_key])):
+        with pytest.raises(jwt.PyJWTError):
+            TokenType.from_token(token)
+
+
+def test_tokens_without_kid_are_rejected(
+    db_verified_user_status, override_gqlauth, rsa_key
+):
+    user = db_verified_user_status.user.obj
+    token = TokenType.from_user(user)
+    with override_gqlauth(name="JWT_KEY_RING", replace=KeyRing.from_keys([rsa_key])):
+        with pytest.raises(jwt.InvalidTokenError):
+            TokenType.from_token(token.token)
+        with override_gqlauth(name="JWT_KEY_RING_ALLOW_SECRET_KEY", replace=True):
+            assert TokenType.from_token(token.token).get_user_instance() == user
+
+
+def test_concurrent_refreshes_load_once(rsa_key):
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return [rsa_key]
+
+    key_ring = KeyRing(loader=loader, refresh_interval=timedelta(minutes=1))
+    key_ring.reload()
+    calls.clear()
+    key_ring._loaded_at -= 120  # type: ignore
+
+    def refresh():
+        barrier.wait()
+        key_ring.signing_key()
+
+    threads = [threading.Thread(target=refresh) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+
+
+def test_parsed_keys_are_cached(rsa_key):
+    key_ring = KeyRing.from_keys([rsa_key])
+    with patch.object(KeyRing, "_parse", wraps=KeyRing._parse) as parse:
+        key_ring.signing_key()
+        key_ring.reload()
+        key_ring.verification_key(rsa_key.kid)
+    assert parse.call_count == 1
+
+
+def test_jwks_endpoint(client, db_verified_user_status, override_gqlauth, rsa_key):
+    hmac_key = JWTKey(kid="hs-1", algorithm="HS256", private_key="top secret")
+    key_ring = KeyRing.from_keys([rsa_key, hmac_key])
+    with override_gqlauth(name="JWT_KEY_RING", replace=key_ring):
+        token = TokenType.from_user(db_verified_user_status.user.obj).token
+        res = client.get("/.well-known/jwks.json")
+        assert res.status_code == 200
+        assert "max-age" in res["Cache-Control"]
+        jwk_set = jwt.PyJWKSet.from_dict(res.json())
+        # secrets are never published.
+        assert [key.key_id for key in jwk_set.keys] == ["rsa-1"]
+        # other services can verify the token with the public key only.
+        jwt.decode(token, key=jwk_set["rsa-1"].key, algorithms=["RS256"])
+
+        res = client.get("/.well-known/jwks.json", HTTP_IF_NONE_MATCH=res["ETag"])
+        assert res.status_code == 304
@@ -1,5 +1,17 @@
 import pytest
-
+from django.contrib.auth import get_user_model
+
+from gqlauth.core.middlewares import (
+    USER_OR_ERROR_KEY,
+    UserOrError,
+    aget_user_or_error,
+    django_jwt_middleware,
+    get_user_or_error,
+)
+from gqlauth.core.types_ import GQLAuthErrors
+from gqlauth.jwt.claims import ClaimsUser
+
+UserModel = get_user_model()
 pytestmark = pytest.mark.default_user
 
 
@@ -69,3 +81,123 @@ async def test_async_middleware(async_client):
         content_type="application/json",
     )
     assert res.json()["data"]["amIAnonymous"] is True
+
+
+def test_stateless_authentication_does_not_query_the_db(
+    rf, db_verified_user_status, override_gqlauth, django_assert_num_queries
+):
+    with override_gqlauth(name="JWT_STATELESS_AUTHENTICATION", replace=True):
+        token = db_verified_user_status.generate_fresh_token()
+        request = rf.post(path="/fake", HTTP_AUTHORIZATION=token)
+        with django_assert_num_queries(0):
+            user = get_user_or_error(request).user
+            assert isinstance(user, ClaimsUser)
+            assert user.is_authenticated
+            assert user.is_active
+            assert user.status.verified
+            assert not user.status.archived
+            assert (
+                getattr(user, UserModel.USERNAME_FIELD)
+                == db_verified_user_status.user.username_field
+            )
+        # anything else is loaded from the database.
+        with django_assert_num_queries(1):
+            assert user.pk == db_verified_user_status.user.obj.pk
+
+
+def test_stateless_authentication_accepts_tokens_without_claims(
+    rf, db_verified_user_status, override_gqlauth
+):
+    token = db_verified_user_status.generate_fresh_token()
+    with override_gqlauth(name="JWT_STATELESS_AUTHENTICATION", replace=True):
+        request = rf.post(path="/fake", HTTP_AUTHORIZATION=token)
+        user = get_user_or_error(request).user
+    assert user == db_verified_user_status.user.obj
+
+
+def test_django_middleware_resolves_user_lazily(
+    rf, db_verified_user_status, django_assert_num_queries
+):
+    def get_response(request):
+        return request
+
+    request = rf.post(
+        path="/fake",
+        HTTP_AUTHORIZATION=db_verified_user_status.generate_fresh_token(),
+    )
+    with django_assert_num_queries(0):
+        request = django_jwt_middleware(get_response)(request)
+        user_or_error = getattr(request, USER_OR_ERROR_KEY)
+        assert not user_or_error.is_resolved
+    with django_assert_num_queries(1):
+        assert user_or_error.user == db_verified_user_status.user.obj
+        assert user_or_error.error is None
+    assert user_or_error.is_resolved
+
+
+def test_lazy_user_or_error_missing_token(rf):
+    request = django_jwt_middleware(lambda request: request)(rf.post(path="/fake"))
+    user_or_error = getattr(request, USER_OR_ERROR_KEY)
+    assert user_or_error.user.is_anonymous
+    assert user_or_error.error.message == GQLAuthErrors.MISSING_TOKEN.value
+
+
+async def test_aget_user_or_error(rf, db_verified_user_status):
+    request = rf.post(
+        path="/fake",
+        HTTP_AUTHORIZATION=db_verified_user_status.generate_fresh_token(),
+    )
+    user_or_error = await aget_user_or_error(request)
+    assert user_or_error.error is None
+    assert user_or_error.user == db_verified_user_status.user.obj
+    # status is fetched within the same query.
+    assert user_or_error.user.status.verified
+
+
+async def test_async_middleware_authorized_user(
+    async_client, db_verified_user_status, auth_headers
+):
+    res = await async_client.post(
+        path="/arg_schema_async",
+        data={"query": "query { amIAnonymous }"},
+        content_type="application/json",
+        **auth_headers,
+    )
+    assert res.json()["data"]["amIAnonymous"] is False
+
+
+def test_stateless_authentication_rejects_revoked_tokens(
+    rf, db_verified_user_status, override_gqlauth
+):
+    from gqlauth.models import UserStatus
+
+    with override_gqlauth(name="JWT_STATELESS_AUTHENTICATION", replace=True):
+        token = db_verified_user_status.generate_fresh_token()
+        UserStatus.revoke_tokens(db_verified_user_status.user.obj)
+        request = rf.post(path="/fake", HTTP_AUTHORIZATION=token)
+        user_or_error = get_user_or_error(request)
+    assert user_or_error.error.message == GQLAuthErrors.EXPIRED_TOKEN.value
+
+
+def test_lazy_user_or_error_deleted_user(rf, db_verified_user_status):
+    request = django_jwt_middleware(lambda request: request)(
+        rf.post(
+            path="/fake",
+            HTTP_AUTHORIZATION=db_verified_user_status.generate_fresh_token(),
+        )
+    )
+    db_verified_user_status.user.obj.delete()
+    user_or_error = getattr(request, USER_OR_ERROR_KEY)
+    assert user_or_error.user.is_anonymous
+    assert user_or_error.error.message == GQLAuthErrors.INVALID_TOKEN.value
+
+
+def test_lazy_user_or_error_resolver_failure_is_not_swallowed():
+    def resolver():
+        raise ConnectionError
+
+    user_or_error = UserOrError.lazy(resolver)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            assert user_or_error.user
+    assert not user_or_error.is_resolved
@@ -1,5 +1,7 @@
 import dataclasses
 
+from gqlauth.models import RefreshToken
+
 from .conftest import UserStatusType, fake
 
 
@@ -111,4 +113,9 @@ def test_revoke_refresh_tokens_on_password_change(
     # the last token is not revoked
     # since it is returned by the password change mutation.
     for token in list(refresh_tokens)[:-1]:
+        assert token.is_expired_()
         assert token.revoked
+    assert not list(refresh_tokens)[-1].is_expired_()
+    assert list(RefreshToken.objects.filter(user=user).active()) == [
+        list(refresh_tokens)[-1]
+    ]
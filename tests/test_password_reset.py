@@ -101,7 +101,7 @@ def test_revoke_refresh_tokens_on_password_reset(
     refresh_tokens = user.refresh_tokens.all()
     assert refresh_tokens
     for token in refresh_tokens:
-        assert token.revoked
+        assert token.is_expired_()
 
 
 def test_reset_password_verify_user(db_verified_user_status, verified_schema):
@@ -0,0 +1,39 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from gqlauth.models import RefreshToken
+
+
+def _purge(*args) -> str:
+    out = StringIO()
+    call_command("gqlauth_purge_tokens", "--sleep=0", *args, stdout=out)
+    return out.getvalue()
+
+
+def test_purge_tokens(db_verified_user_status):
+    now = timezone.now()
+    tokens = [db_verified_user_status.generate_refresh_token() for _ in range(5)]
+    expired, old_revoked, fresh_revoked = tokens[:3]
+    RefreshToken.objects.filter(pk=expired.pk).update(
+        expires_at=now - timedelta(days=1)
+    )
+    RefreshToken.objects.filter(pk=old_revoked.pk).update(
+        revoked=now - timedelta(days=8)
+    )
+    RefreshToken.objects.filter(pk=fresh_revoked.pk).update(revoked=now)
+
+    output = _purge("--dry-run", "--batch-size=1")
+    assert "Would delete 2 refresh tokens." in output
+    assert RefreshToken.objects.count() == 5
+
+    output = _purge("--batch-size=1")
+    assert "Deleted 2 refresh tokens." in output
+    assert set(RefreshToken.objects.values_list("pk", flat=True)) == {
+        token.pk for token in tokens[2:]
+    }
+
+    assert "Deleted 1 refresh tokens." in _purge("--revoked-days=0")
+    assert RefreshToken.objects.count() == 2
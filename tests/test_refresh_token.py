@@ -1,4 +1,14 @@
+from datetime import timedelta
+from typing import cast
+
+import strawberry
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+
 from gqlauth.core.constants import Messages
+from gqlauth.jwt.types_ import RefreshTokenType
+from gqlauth.models import RefreshToken, UserStatus
 
 
 def _arg_query(token: str, revoke="false"):
@@ -17,6 +27,10 @@ def _arg_query(token: str, revoke="false"):
           expiresAt
           created
         }}
+        user {{
+          verified
+          archived
+        }}
       }}
     }}
     """.format(token, revoke)
@@ -33,6 +47,16 @@ def test_refresh_token(db_verified_user_status, anonymous_schema):
     assert not executed["errors"]
 
 
+def test_only_token_hash_is_stored(db_verified_user_status):
+    refresh = db_verified_user_status.generate_refresh_token()
+    assert refresh.token
+    stored = RefreshToken.objects.get(pk=refresh.pk)
+    assert stored.token is None
+    assert stored.token_hash == RefreshToken.hash_token(refresh.token)
+    assert refresh.token not in stored.token_hash
+    assert RefreshToken.objects.get_by_token(refresh.token).pk == refresh.pk
+
+
 def test_invalid_token(anonymous_schema, db):
     query = _arg_query("invalid_token")
     res = anonymous_schema.execute(query=query)
@@ -52,7 +76,7 @@ def test_revoke_refresh_token(anonymous_schema, db_verified_user_status):
     executed = executed.data["refreshToken"]
     assert executed["success"]
     assert executed["token"]["token"]
-    assert executed["refreshToken"]["token"]
+    assert executed["refreshToken"]["token"] != refresh.token
     assert not executed["errors"]
 
     refresh.refresh_from_db()
@@ -64,3 +88,131 @@ def test_revoke_refresh_token(anonymous_schema, db_verified_user_status):
         executed.data["refreshToken"]["errors"]["nonFieldErrors"]
         == Messages.EXPIRED_TOKEN
     )
+
+
+def test_refresh_token_queries(
+    db_verified_user_status, anonymous_schema, django_assert_num_queries
+):
+    refresh = db_verified_user_status.generate_refresh_token()
+    # a single joined read.
+    with django_assert_num_queries(1):
+        executed = anonymous_schema.execute(query=_arg_query(refresh.token))
+    assert not executed.errors
+    executed = executed.data["refreshToken"]
+    assert executed["success"]
+    assert executed["refreshToken"]["token"] == refresh.token
+    assert executed["user"]["verified"]
+
+
+def test_rotate_refresh_token_queries(
+    db_verified_user_status, anonymous_schema, django_assert_num_queries
+):
+    refresh = db_verified_user_status.generate_refresh_token()
+    # read, revoke and insert, between BEGIN and COMMIT.
+    with django_assert_num_queries(5):
+        executed = anonymous_schema.execute(query=_arg_query(refresh.token, "true"))
+    assert not executed.errors
+    executed = executed.data["refreshToken"]
+    assert executed["success"]
+    assert executed["refreshToken"]["token"] != refresh.token
+    assert executed["user"]["verified"]
+
+
+def test_create_refresh_token_queries(
+    db_verified_user_status, django_assert_num_queries
+):
+    user = db_verified_user_status.user.obj
+    with django_assert_num_queries(1):
+        RefreshToken.from_user(user)
+
+
+def test_rotation_grace(
+    db_verified_user_status, anonymous_schema, override_gqlauth, app_settings
+):
+    refresh = db_verified_user_status.generate_refresh_token()
+    query = _arg_query(refresh.token, "true")
+    with override_gqlauth(
+        name="JWT_REFRESH_TOKEN_ROTATION_GRACE", replace=timedelta(seconds=30)
+    ):
+        first = anonymous_schema.execute(query=query).data["refreshToken"]
+        second = anonymous_schema.execute(query=query).data["refreshToken"]
+    assert first["success"]
+    assert second["success"]
+    # both callers got a live token of their own.
+    successor = RefreshToken.objects.get_by_token(first["refreshToken"]["token"])
+    sibling = RefreshToken.objects.get_by_token(second["refreshToken"]["token"])
+    assert successor != sibling
+    assert not successor.is_expired_()
+    assert not sibling.is_expired_()
+    # the raw successor is not kept in the cache.
+    cached = caches[app_settings.CACHE_ALIAS].get(
+        f"gqlauth:refresh_token:successor:{refresh.token_hash}"
+    )
+    assert cached == successor.token_hash
+
+    # nothing is handed out once the successor is revoked.
+    successor.revoke()
+    with override_gqlauth(
+        name="JWT_REFRESH_TOKEN_ROTATION_GRACE", replace=timedelta(seconds=30)
+    ):
+        res = anonymous_schema.execute(query=query).data["refreshToken"]
+    assert res["errors"]["nonFieldErrors"] == Messages.EXPIRED_TOKEN
+
+    # the grace period has passed.
+    RefreshToken.objects.filter(pk=refresh.pk).update(
+        revoked=timezone.now() - timedelta(minutes=1)
+    )
+    with override_gqlauth(
+        name="JWT_REFRESH_TOKEN_ROTATION_GRACE", replace=timedelta(seconds=30)
+    ):
+        res = anonymous_schema.execute(query=query).data["refreshToken"]
+    assert res["errors"]["nonFieldErrors"] == Messages.EXPIRED_TOKEN
+
+
+def test_max_active_refresh_tokens(db_verified_user_status, override_gqlauth):
+    user = db_verified_user_status.user.obj
+    with override_gqlauth(name="JWT_MAX_ACTIVE_REFRESH_TOKENS_PER_USER", replace=2):
+        tokens = [RefreshToken.from_user(user) for _ in range(4)]
+    active = RefreshToken.objects.filter(user=user).active()
+    assert {token.pk for token in active} == {token.pk for token in tokens[2:]}
+    assert RefreshToken.objects.filter(user=user).count() == 4
+
+
+def test_refresh_token_type_is_expired_queries(
+    db_verified_user_status, django_assert_num_queries
+):
+    is_expired = next(
+        field.base_resolver.wrapped_func
+        for field in RefreshTokenType.__strawberry_definition__.fields
+        if field.python_name == "is_expired"
+    )
+    refresh = db_verified_user_status.generate_refresh_token()
+    annotated = RefreshToken.objects.with_token_generation().get(pk=refresh.pk)
+    with django_assert_num_queries(0):
+        assert not is_expired(annotated)
+    # a plain row reads the generation alone, not the user and its status.
+    row = RefreshToken.objects.get(pk=refresh.pk)
+    with django_assert_num_queries(1):
+        assert not is_expired(row)
+    UserStatus.objects.filter(user=refresh.user).update(
+        token_generation=F("token_generation") + 1
+    )
+    assert is_expired(RefreshToken.objects.with_token_generation().get(pk=refresh.pk))
+    assert is_expired(RefreshToken.objects.get(pk=refresh.pk))
+
+
+def test_refresh_token_type_from_a_stored_row(db_verified_user_status):
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        def refresh_token(self, pk: int) -> RefreshTokenType:
+            return cast(RefreshTokenType, RefreshToken.objects.get(pk=pk))
+
+    refresh = db_verified_user_status.generate_refresh_token()
+    res = strawberry.Schema(query=Query).execute_sync(
+        "query ($pk: Int!) { refreshToken(pk: $pk) { token isExpired } }",
+        variable_values={"pk": refresh.pk},
+    )
+    assert not res.errors
+    # only the digest is stored.
+    assert res.data["refreshToken"] == {"token": None, "isExpired": False}
@@ -0,0 +1,79 @@
+import pytest
+
+from gqlauth.core.constants import Messages
+from gqlauth.core.utils import revoke_user_refresh_token
+from gqlauth.jwt.storage import DjangoCacheRefreshTokenStorage, RefreshTokenStorage
+from gqlauth.models import RefreshToken
+
+
+def _arg_query(token: str, revoke="false"):
+    return """
+    mutation MyMutation {{
+      refreshToken(refreshToken: "{}", revokeRefreshToken: {}) {{
+        errors
+        success
+        refreshToken {{
+          token
+          revoked
+          isExpired
+        }}
+      }}
+    }}
+    """.format(token, revoke)
+
+
+@pytest.fixture()
+def cache_storage(override_gqlauth):
+    storage = DjangoCacheRefreshTokenStorage()
+    with override_gqlauth(name="JWT_REFRESH_TOKEN_STORAGE", replace=storage):
+        yield storage
+
+
+def test_create_and_get(db_verified_user_status, cache_storage):
+    user = db_verified_user_status.user.obj
+    refresh = RefreshToken.from_user(user)
+    assert not RefreshToken.objects.exists()
+    found = cache_storage.get(refresh.token)
+    assert found.user == user
+    assert found.expires_at == refresh.expires_at
+    assert not found.is_expired_()
+    assert cache_storage.get("invalid") is None
+
+
+def test_revoke(db_verified_user_status, cache_storage):
+    refresh = RefreshToken.from_user(db_verified_user_status.user.obj)
+    assert refresh.revoke()
+    assert not refresh.revoke()
+    assert cache_storage.get(refresh.token).is_expired_()
+
+
+def test_revoke_user(db_verified_user_status, cache_storage):
+    user = db_verified_user_status.user.obj
+    tokens = [RefreshToken.from_user(user) for _ in range(3)]
+    revoke_user_refresh_token(user)
+    assert all(cache_storage.get(token.token).revoked for token in tokens)
+    assert not cache_storage.get(RefreshToken.from_user(user).token).revoked
+
+
+def test_refresh_without_database_writes(
+    db_verified_user_status, cache_storage, anonymous_schema, django_assert_num_queries
+):
+    refresh = RefreshToken.from_user(db_verified_user_status.user.obj)
+    # only the user is read.
+    with django_assert_num_queries(1):
+        res = anonymous_schema.execute(_arg_query(refresh.token, "true"))
+    assert not res.errors
+    res = res.data["refreshToken"]
+    assert res["success"]
+    assert res["refreshToken"]["token"] != refresh.token
+    res = anonymous_schema.execute(_arg_query(refresh.token)).data["refreshToken"]
+    assert res["errors"]["nonFieldErrors"] == Messages.EXPIRED_TOKEN
+
+
+def test_refresh_token_storage_requires_its_methods():
+    class CreateOnlyStorage(RefreshTokenStorage):
+        def create(self, user):
+            raise AssertionError
+
+    with pytest.raises(TypeError):
+        CreateOnlyStorage()  # type: ignore[abstract]
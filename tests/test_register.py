@@ -98,12 +98,14 @@ def test_register_twice_fails(verified_user_status_type, anonymous_schema, db):
     mock.MagicMock(side_effect=SMTPException),
 )
 @pytest.mark.default_user
-def test_register_email_send_fail(verified_user_status_type, captcha, anonymous_schema):
-    from gqlauth.settings import gqlauth_settings as app_settings
-
+def test_register_email_send_fail(
+    verified_user_status_type, captcha, anonymous_schema, override_gqlauth
+):
     us = verified_user_status_type.user
-    app_settings.SEND_ACTIVATION_EMAIL = True
-    executed = anonymous_schema.execute(query=_arg_query(us, captcha)).data["register"]
+    with override_gqlauth(name="SEND_ACTIVATION_EMAIL", replace=True):
+        executed = anonymous_schema.execute(query=_arg_query(us, captcha)).data[
+            "register"
+        ]
     assert not executed["success"]
     assert executed["errors"]["nonFieldErrors"] == Messages.EMAIL_FAIL
     assert not get_user_model().objects.all()
@@ -1,3 +1,10 @@
+from gqlauth.core.constants import Messages
+from gqlauth.jwt.denylist import get_token_denylist
+from gqlauth.jwt.types_ import TokenType, VerifyTokenInput, VerifyTokenType
+
+from .conftest import UserStatusType, UserType
+
+
 def _arg_query(token: str):
     return """
     mutation MyMutation {
@@ -36,3 +43,52 @@ def test_invalid_token(db_verified_user_status, anonymous_schema):
     assert not res["success"]
     assert res["errors"]
     assert not res["refreshToken"]
+
+
+def test_revoke_user_refresh_tokens(db_verified_user_status, django_assert_num_queries):
+    from gqlauth.core.utils import revoke_user_refresh_token
+
+    user = db_verified_user_status.user.obj
+    for _ in range(3):
+        db_verified_user_status.generate_refresh_token()
+    user.refresh_tokens.first().revoke()
+    with django_assert_num_queries(1):
+        assert revoke_user_refresh_token(user) == 2
+    assert not user.refresh_tokens.filter(revoked__isnull=True).exists()
+    assert revoke_user_refresh_token(user) == 0
+
+
+def test_revoke_access_token_along(
+    db_verified_user_status, anonymous_schema, override_gqlauth
+):
+    token = TokenType.from_user(db_verified_user_status.user.obj)
+    other = UserStatusType(verified=True, user=UserType.generate())
+    other.create()
+    query = """
+    mutation {
+      revokeToken(refreshToken: "%s", token: "%s") {
+        errors
+        success
+      }
+    }
+    """
+    with override_gqlauth(name="JWT_DENYLIST", replace=True):
+        denylist = get_token_denylist()
+        denylist.reset()
+        for refresh_token, access_token in (
+            (db_verified_user_status.generate_refresh_token(), "invalid"),
+            # someone else's access token.
+            (other.generate_refresh_token(), token.token),
+        ):
+            res = anonymous_schema.execute(
+                query % (refresh_token.token, access_token)
+            ).data["revokeToken"]
+            assert res["errors"]["nonFieldErrors"] == Messages.INVALID_TOKEN
+            assert not refresh_token.is_expired_()
+
+        refresh_token = db_verified_user_status.generate_refresh_token()
+        res = anonymous_schema.execute(query % (refresh_token.token, token.token))
+        assert res.data["revokeToken"] == {"errors": None, "success": True}
+        result = VerifyTokenType.from_token(VerifyTokenInput(token=token.token))
+        assert result.errors == Messages.REVOKED_TOKEN
+        denylist.reset()
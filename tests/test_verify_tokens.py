@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from gqlauth.core.constants import Messages
+from gqlauth.jwt.types_ import TokenType
+
+
+def _arg_query(*tokens: str) -> str:
+    tokens_arg = ", ".join(f'"{token}"' for token in tokens)
+    return (
+        """
+    mutation {
+      verifyTokens(tokens: [%s]) {
+        success
+        results {
+          success
+          errors
+          user {
+            id
+          }
+        }
+      }
+    }
+    """
+        % tokens_arg
+    )
+
+
+def _relay_query(*tokens: str) -> str:
+    tokens_arg = ", ".join(f'"{token}"' for token in tokens)
+    return (
+        """
+    mutation {
+      verifyTokens(input: {tokens: [%s]}) {
+        success
+        errors
+        results {
+          success
+          errors
+        }
+      }
+    }
+    """
+        % tokens_arg
+    )
+
+
+def test_verify_tokens(
+    db_verified_user_status,
+    db_unverified_user_status,
+    anonymous_schema,
+    override_gqlauth,
+    django_assert_num_queries,
+):
+    verified = TokenType.from_user(db_verified_user_status.user.obj).token
+    unverified = TokenType.from_user(db_unverified_user_status.user.obj).token
+    with override_gqlauth(name="JWT_EXPIRATION_DELTA", replace=timedelta(seconds=-1)):
+        expired = TokenType.from_user(db_verified_user_status.user.obj).token
+    with django_assert_num_queries(1):
+        res = anonymous_schema.execute(
+            _arg_query(verified, "invalid", expired, unverified)
+        )
+    assert not res.errors
+    res = res.data["verifyTokens"]
+    assert res["success"]
+    results = res["results"]
+    assert [result["success"] for result in results] == [True, False, False, True]
+    assert results[0]["user"]["id"] == str(db_verified_user_status.user.obj.pk)
+    assert results[1]["errors"]["nonFieldErrors"] == Messages.INVALID_TOKEN
+    assert results[2]["errors"]["nonFieldErrors"] == Messages.EXPIRED_TOKEN
+    assert results[3]["user"]["id"] == str(db_unverified_user_status.user.obj.pk)
+
+
+def test_verify_tokens_deleted_user(db_verified_user_status, anonymous_schema):
+    token = TokenType.from_user(db_verified_user_status.user.obj).token
+    db_verified_user_status.user.obj.delete()
+    res = anonymous_schema.execute(_relay_query(token), relay=True)
+    assert not res.errors
+    result = res.data["verifyTokens"]["results"][0]
+    assert not result["success"]
+    assert result["errors"]["nonFieldErrors"] == Messages.INVALID_CREDENTIALS
+
+
+def test_verify_tokens_max_batch(
+    db_verified_user_status, anonymous_schema, override_gqlauth
+):
+    token = TokenType.from_user(db_verified_user_status.user.obj).token
+    with override_gqlauth(name="JWT_VERIFY_TOKENS_MAX_BATCH", replace=2):
+        res = anonymous_schema.execute(_relay_query(token, token), relay=True)
+        assert res.data["verifyTokens"]["success"]
+        res = anonymous_schema.execute(_relay_query(token, token, token), relay=True)
+    assert not res.errors
+    res = res.data["verifyTokens"]
+    assert not res["success"]
+    assert res["errors"]["nonFieldErrors"] == Messages.TOO_MANY_TOKENS
+    assert res["results"] == []
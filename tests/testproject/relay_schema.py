@@ -27,6 +27,7 @@ class Mutation:
     token_auth = relay.ObtainJSONWebToken.field
     register = relay.Register.field
     verify_token = relay.VerifyToken.field
+    verify_tokens = relay.VerifyTokens.field
     resend_activation_email = relay.ResendActivationEmail.field
     send_password_reset_email = relay.SendPasswordResetEmail.field
     password_reset = relay.PasswordReset.field
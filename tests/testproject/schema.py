@@ -30,6 +30,7 @@ class Mutation:
         return apple
 
     verify_token = arg_mutations.VerifyToken.field
+    verify_tokens = arg_mutations.VerifyTokens.field
     update_account = arg_mutations.UpdateAccount.field
     archive_account = arg_mutations.ArchiveAccount.field
     delete_account = arg_mutations.DeleteAccount.field
@@ -21,12 +21,14 @@ from django.urls import path
 from django.views.decorators.csrf import csrf_exempt
 from strawberry.django.views import AsyncGraphQLView, GraphQLView
 
+from gqlauth.jwt.views import jwks
 from tests.testproject import relay_schema
 
 from . import schema
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path(".well-known/jwks.json", jwks),
     path("arg_schema", csrf_exempt(GraphQLView.as_view(schema=schema.arg_schema))),
     path(
         "relay_schema",